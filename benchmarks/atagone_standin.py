@@ -0,0 +1,224 @@
+"""
+Local ATAG One stand-in server
+
+Implements /retrieve, /update and /pair_message of the thermostat's local
+API on top of aiohttp, serving the reply in retrieve_reply.json. Latency,
+jitter and faults (5xx, 429/503 with Retry-After, dropped connections) are
+configurable, so AtagOneApi can be exercised and benchmarked offline.
+
+    python benchmarks/atagone_standin.py --port 10000 --profile flaky
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Optional, Tuple
+
+from aiohttp import web
+
+HERE = os.path.dirname(__file__)
+
+""" info bit -> retrieve_reply section (details is part of report) """
+INFO_SECTIONS = {
+    1: "control",
+    2: "schedules",
+    4: "configuration",
+    8: "report",
+    16: "status",
+    32: "wifiscan",
+}
+INFO_REPORT_DETAILS = 64
+
+UPDATE_SECTIONS = ("control", "configuration", "schedules")
+
+
+@dataclass(frozen=True)
+class FaultProfile:
+    """Latency and fault injection settings; rates are per request (0..1)."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    unavailable_rate: float = 0.0
+    drop_rate: float = 0.0
+    retry_after: float = 1.0
+
+
+PROFILES: Dict[str, FaultProfile] = {
+    "ideal": FaultProfile(),
+    "lan": FaultProfile(latency=0.03, jitter=0.02),
+    "slow": FaultProfile(latency=0.6, jitter=0.3),
+    "flaky": FaultProfile(latency=0.03, jitter=0.02, error_rate=0.1, drop_rate=0.05),
+    "busy": FaultProfile(latency=0.05, jitter=0.02, throttle_rate=0.1, unavailable_rate=0.05, retry_after=0.5),
+}
+
+
+def load_reply() -> Dict[str, Any]:
+    with open(os.path.join(HERE, "retrieve_reply.json")) as fp:
+        return json.load(fp)["retrieve_reply"]
+
+
+class AtagStandIn:
+    """aiohttp application answering like an ATAG One thermostat."""
+
+    def __init__(
+        self,
+        profile: FaultProfile = PROFILES["ideal"],
+        reply: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None,
+    ):
+        self.profile = profile
+        self.reply = copy.deepcopy(reply if reply is not None else load_reply())
+        self.random = random.Random(seed)
+        self.requests: Dict[str, int] = {}
+        self.statuses: Dict[int, int] = {}
+        self.dropped = 0
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/retrieve", self._retrieve)
+        self.app.router.add_post("/update", self._update)
+        self.app.router.add_post("/pair_message", self._pair)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """Start serving; port 0 picks a free port. Returns (host, port)."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        return host, self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _fault(self, request: web.Request) -> Optional[web.Response]:
+        """Delay the request and return the injected fault response, if any."""
+        path = request.path
+        self.requests[path] = self.requests.get(path, 0) + 1
+
+        profile = self.profile
+        delay = profile.latency + self.random.uniform(-profile.jitter, profile.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        roll = self.random.random()
+        for rate, status in (
+            (profile.drop_rate, None),
+            (profile.error_rate, 500),
+            (profile.throttle_rate, 429),
+            (profile.unavailable_rate, 503),
+        ):
+            if roll < rate:
+                break
+            roll -= rate
+        else:
+            return None
+
+        if status is None:
+            # drop the connection without answering
+            self.dropped += 1
+            request.transport.abort()
+            return web.Response()
+
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        headers = {}
+        if status in (429, 503):
+            headers["Retry-After"] = f"{profile.retry_after:g}"
+        return web.Response(status=status, headers=headers)
+
+    def _ok(self, body: Dict[str, Any]) -> web.Response:
+        self.statuses[200] = self.statuses.get(200, 0) + 1
+        return web.json_response(body)
+
+    def _tick(self) -> None:
+        self.reply["seqnr"] = self.reply.get("seqnr", 0) + 1
+        report = self.reply.get("report")
+        if isinstance(report, dict) and "report_time" in report:
+            report["report_time"] += 1
+
+    async def _retrieve(self, request: web.Request) -> web.Response:
+        fault = await self._fault(request)
+        if fault is not None:
+            return fault
+
+        message = (await request.json())["retrieve_message"]
+        info = message.get("info", 127)
+        self._tick()
+        reply = {"seqnr": message.get("seqnr", 0), "acc_status": 2}
+        for bit, section in INFO_SECTIONS.items():
+            if info & bit and section in self.reply:
+                reply[section] = self.reply[section]
+        if "report" in reply and not info & INFO_REPORT_DETAILS:
+            reply["report"] = {k: v for k, v in reply["report"].items() if k != "details"}
+        return self._ok({"retrieve_reply": reply})
+
+    async def _update(self, request: web.Request) -> web.Response:
+        fault = await self._fault(request)
+        if fault is not None:
+            return fault
+
+        message = (await request.json())["update_message"]
+        for section in UPDATE_SECTIONS:
+            values = message.get(section)
+            if not values:
+                continue
+            target = self.reply.setdefault(section, {})
+            for key, value in values.items():
+                if isinstance(value, dict) and isinstance(target.get(key), dict):
+                    target[key].update(value)
+                else:
+                    target[key] = value
+        self._tick()
+        return self._ok({"update_reply": {"seqnr": message.get("seqnr", 0), "acc_status": 2}})
+
+    async def _pair(self, request: web.Request) -> web.Response:
+        fault = await self._fault(request)
+        if fault is not None:
+            return fault
+        return self._ok({"pair_reply": {"seqnr": 0, "acc_status": 2}})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=10000)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="lan")
+    for field in fields(FaultProfile):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=float, dest=field.name)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    overrides = {
+        field.name: getattr(args, field.name)
+        for field in fields(FaultProfile)
+        if getattr(args, field.name) is not None
+    }
+    profile = replace(PROFILES[args.profile], **overrides)
+
+    async def serve() -> None:
+        standin = AtagStandIn(profile, seed=args.seed)
+        host, port = await standin.start(args.host, args.port)
+        print(f"ATAG One stand-in on http://{host}:{port} ({profile})")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await standin.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Benchmark: AtagOneApi poll and write cycles against the local stand-in server
+
+Runs offline against benchmarks/atagone_standin.py and reports
+  - poll-cycle latency (scheduled partial polls and full retrieves)
+  - write latency while other consumers keep polling
+  - retry behaviour and outcome per fault profile
+  - allocations per poll cycle (tracemalloc)
+
+and fails when a write confirmation drops report.details.
+
+    python benchmarks/bench_poll_cycle.py [--cycles 200]
+
+Admission control is disabled unless --paced is given, so the numbers show
+the transport itself rather than the configured request pacing.
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from statistics import mean, quantiles
+from typing import Dict, List
+
+HERE = os.path.dirname(__file__)
+sys.path.append(HERE)
+sys.path.append(os.path.join(HERE, "..", "custom_components", "atagone"))
+
+from atagone_standin import PROFILES, AtagStandIn  # noqa: E402
+from wrapper.atagoneapi import AtagOneApi, AtagConnectException  # noqa: E402
+from wrapper.atagonejson import MESSAGE_INFO_ALL  # noqa: E402
+
+""" Seconds every poll may take, like the coordinator """
+POLL_DEADLINE = 20
+
+""" Pollers running next to the writer in the write benchmark """
+CONCURRENT_POLLERS = 3
+
+
+def summary(samples: List[float]) -> str:
+    if len(samples) < 2:
+        return "n/a"
+    cuts = quantiles(samples, n=100)
+    return (
+        f"mean {mean(samples) * 1000:7.2f} ms  p50 {cuts[49] * 1000:7.2f} ms  "
+        f"p95 {cuts[94] * 1000:7.2f} ms  max {max(samples) * 1000:7.2f} ms"
+    )
+
+
+def make_api(port: int, paced: bool) -> AtagOneApi:
+    if paced:
+        return AtagOneApi("127.0.0.1", port)
+    return AtagOneApi("127.0.0.1", port, min_request_gap=0, max_request_rate=1e9)
+
+
+async def timed(coro) -> float:
+    started = time.perf_counter()
+    await coro
+    return time.perf_counter() - started
+
+
+async def bench_poll_latency(cycles: int, paced: bool) -> None:
+    standin = AtagStandIn(PROFILES["lan"], seed=1)
+    _, port = await standin.start()
+    api = make_api(port, paced)
+    try:
+        scheduled = [
+            await timed(api.async_update(deadline=api.deadline_in(POLL_DEADLINE)))
+            for _ in range(cycles)
+        ]
+        full = [
+            await timed(api.async_update(MESSAGE_INFO_ALL, deadline=api.deadline_in(POLL_DEADLINE)))
+            for _ in range(cycles // 4)
+        ]
+    finally:
+        await api.async_close()
+        await standin.stop()
+
+    print("poll-cycle latency (profile lan)")
+    print(f"  scheduled poll : {summary(scheduled)}")
+    print(f"  full retrieve  : {summary(full)}")
+
+
+async def bench_write_under_polling(writes: int, paced: bool) -> None:
+    standin = AtagStandIn(PROFILES["lan"], seed=2)
+    _, port = await standin.start()
+    api = make_api(port, paced)
+    await api.async_update(MESSAGE_INFO_ALL)
+    stop = asyncio.Event()
+
+    async def poller() -> None:
+        while not stop.is_set():
+            try:
+                await api.async_update(deadline=api.deadline_in(POLL_DEADLINE))
+            except AtagConnectException:
+                pass
+
+    pollers = [asyncio.create_task(poller()) for _ in range(CONCURRENT_POLLERS)]
+    try:
+        latencies = []
+        for index in range(writes):
+            value = 18.0 + index % 5
+            latencies.append(await timed(api.send_dynamic_change("ch_mode_temp", value)))
+    finally:
+        stop.set()
+        await asyncio.gather(*pollers)
+        await api.async_close()
+        await standin.stop()
+
+    print(f"write latency with {CONCURRENT_POLLERS} concurrent pollers (profile lan, includes the write window)")
+    print(f"  write          : {summary(latencies)}")
+    for priority, stats in api.queue_wait_stats.items():
+        if stats["count"]:
+            print(
+                f"  queue wait {priority:6s}: p50 {stats['p50'] * 1000:7.2f} ms  "
+                f"p95 {stats['p95'] * 1000:7.2f} ms  ({stats['count']} requests)"
+            )
+
+
+async def check_confirmation_keeps_details() -> None:
+    """Fail when the confirmation retrieve of a control write drops report.details."""
+    standin = AtagStandIn(PROFILES["ideal"], seed=3)
+    _, port = await standin.start()
+    api = AtagOneApi("127.0.0.1", port, min_request_gap=0, max_request_rate=1e9, confirm_delay=0.05)
+    confirmed = asyncio.Event()
+    api.add_update_listener(confirmed.set)
+    try:
+        await api.async_update(MESSAGE_INFO_ALL)
+        before = api.sensors.get("boiler_return_temp")
+        await api.send_dynamic_change("ch_mode_temp", 19.5)
+        await asyncio.wait_for(confirmed.wait(), 5)
+        after = api.sensors.get("boiler_return_temp")
+        details = api.snapshot.section("report").get("details")
+    finally:
+        await api.async_close()
+        await standin.stop()
+
+    if before is None or after is None or not details:
+        raise SystemExit(f"write confirmation dropped report.details ({before} -> {after})")
+    print(f"write confirmation keeps report.details (boiler_return_temp {before} -> {after})")
+
+
+async def bench_fault_profiles(cycles: int, paced: bool) -> None:
+    print("retry behaviour per fault profile")
+    for name in ("lan", "flaky", "busy", "slow"):
+        standin = AtagStandIn(PROFILES[name], seed=3)
+        _, port = await standin.start()
+        api = make_api(port, paced)
+        outcomes: Dict[str, int] = {}
+        latencies = []
+        try:
+            for _ in range(cycles):
+                started = time.perf_counter()
+                try:
+                    await api.async_update(deadline=api.deadline_in(POLL_DEADLINE))
+                    outcome = "ok"
+                except AtagConnectException as exc:
+                    outcome = type(exc).__name__
+                latencies.append(time.perf_counter() - started)
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        finally:
+            await api.async_close()
+            await standin.stop()
+
+        total = api.metrics.total
+        print(f"  {name:6s}: polls {cycles}  outcomes {outcomes}")
+        print(
+            f"          attempts {total.requests}  retries {total.retries}  "
+            f"failures {total.failures}  statuses {dict(sorted(total.statuses.items()))}  "
+            f"dropped {standin.dropped}  breaker {api.breaker.state}"
+        )
+        print(f"          poll   {summary(latencies)}")
+
+
+async def bench_allocations(cycles: int) -> None:
+    standin = AtagStandIn(PROFILES["ideal"], seed=4)
+    _, port = await standin.start()
+    api = make_api(port, paced=False)
+    try:
+        for _ in range(10):
+            await api.async_update()
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        for _ in range(cycles):
+            await api.async_update()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+    finally:
+        await api.async_close()
+        await standin.stop()
+
+    growth = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    print("allocations per poll cycle (client and stand-in share the process)")
+    print(f"  retained growth: {growth / cycles:8.0f} B/cycle over {cycles} cycles")
+    print(f"  peak traced    : {peak / 1024:8.1f} KiB")
+
+
+async def run(args: argparse.Namespace) -> None:
+    await check_confirmation_keeps_details()
+    print()
+    await bench_poll_latency(args.cycles, args.paced)
+    print()
+    await bench_write_under_polling(max(args.cycles // 10, 5), args.paced)
+    print()
+    await bench_fault_profiles(max(args.cycles // 5, 10), args.paced)
+    print()
+    await bench_allocations(args.cycles)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AtagOneApi poll/write benchmarks")
+    parser.add_argument("--cycles", type=int, default=200)
+    parser.add_argument("--paced", action="store_true", help="keep the default admission control")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: replay a recorded ATAG One trace through AtagOneApi
+
+Replays a trace written by AtagOneApi(record_path=...) without network
+access and reports how the refresh path copes with it:
+  - polls replayed and wall time per poll
+  - refreshes dispatched vs skipped as unchanged
+  - sensor fan-out cost (every sensor value read once per dispatched refresh)
+  - gas_total integrated from power_cons on the recorded time axis
+
+    python benchmarks/bench_replay.py trace.jsonl.gz [--speed 0]
+    python benchmarks/bench_replay.py --record trace.jsonl --polls 200
+
+Without a trace argument a trace is first recorded against the local
+stand-in server (see atagone_standin.py).
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Optional
+
+HERE = os.path.dirname(__file__)
+sys.path.append(HERE)
+sys.path.append(os.path.join(HERE, "..", "custom_components", "atagone"))
+
+from atagone_standin import PROFILES, AtagStandIn  # noqa: E402
+from wrapper.atagoneapi import AtagOneApi, AtagConnectException  # noqa: E402
+from wrapper.atagonejson import MESSAGE_INFO_ALL  # noqa: E402
+from wrapper.atagonerecord import ReplayExhausted, ReplaySession, load_trace  # noqa: E402
+
+
+async def record(path: str, polls: int, interval: float) -> None:
+    standin = AtagStandIn(PROFILES["lan"], seed=5)
+    _, port = await standin.start()
+    api = AtagOneApi("127.0.0.1", port, min_request_gap=0, max_request_rate=1e9, record_path=path)
+    try:
+        await api.async_update(MESSAGE_INFO_ALL)
+        for _ in range(polls):
+            await asyncio.sleep(interval)
+            await api.async_update()
+    finally:
+        await api.async_close()
+        await standin.stop()
+    print(f"recorded {polls + 1} polls to {path}")
+
+
+async def replay(path: str, speed: float) -> None:
+    exchanges = load_trace(path)
+    session = ReplaySession(exchanges, speed)
+    api = AtagOneApi("replay", min_request_gap=0, max_request_rate=1e9, replay=session)
+
+    polls = reads = 0
+    gas_total = 0.0
+    last_time: Optional[float] = None
+    last_flow: Optional[float] = None
+    fanout = 0.0
+    started = time.perf_counter()
+    for exchange in exchanges:
+        if exchange["p"] != "/retrieve":
+            continue
+        try:
+            await api.async_update()
+        except ReplayExhausted:
+            break
+        except AtagConnectException:
+            continue
+        polls += 1
+
+        dispatched = time.perf_counter()
+        sensors = api.sensors
+        for key in sensors:
+            sensors.get(key)
+            reads += 1
+        fanout += time.perf_counter() - dispatched
+
+        # same rule as the gas_total sensor: the previous flow held until now
+        if last_flow is not None and last_time is not None:
+            gas_total += last_flow * (exchange["t"] - last_time) / 3600.0
+        flow = sensors.get("power_cons")
+        last_flow = None if flow is None else max(float(flow), 0.0)
+        last_time = exchange["t"]
+    elapsed = time.perf_counter() - started
+
+    span = (exchanges[-1]["t"] - exchanges[0]["t"]) if exchanges else 0.0
+    print(f"replayed {polls} polls covering {span:.0f}s of trace in {elapsed:.2f}s (speed {speed:g})")
+    print(f"  per poll       : {elapsed / max(polls, 1) * 1000:7.2f} ms")
+    print(f"  refreshes      : dispatched {api.refreshes_dispatched}  skipped {api.refreshes_skipped}")
+    print(f"  sensor fan-out : {reads} reads, {fanout / max(polls, 1) * 1e6:7.1f} us/poll")
+    print(f"  gas_total      : {gas_total:.4f} m3")
+
+
+async def run(args: argparse.Namespace) -> None:
+    path = args.trace
+    if path is None:
+        path = args.record or os.path.join(tempfile.mkdtemp(), "trace.jsonl.gz")
+        await record(path, args.polls, args.interval)
+    await replay(path, args.speed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded AtagOneApi trace")
+    parser.add_argument("trace", nargs="?", help="trace file to replay")
+    parser.add_argument("--record", help="where to record the trace when none is given")
+    parser.add_argument("--polls", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between recorded polls")
+    parser.add_argument("--speed", type=float, default=0, help="replay speed, 1 = recorded pace, 0 = unpaced")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: per-refresh cost of sensor reads, rebuild-per-access vs. sensor index
+
+Every sensor entity reads its value through AtagOneApi.sensors once per
+coordinator refresh. Before the sensor index the flattened dict was rebuilt on
+every access; now it is built once when a new reply is stored.
+
+    python benchmarks/bench_sensor_index.py
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import json
+import os
+import sys
+import timeit
+
+HERE = os.path.dirname(__file__)
+sys.path.append(os.path.join(HERE, "..", "custom_components", "atagone"))
+
+from wrapper.atagoneentity import AtagOneEntity  # noqa: E402
+
+""" Number of coordinator-backed sensor entities reading .sensors per refresh """
+SENSOR_READS = 45
+
+
+def load_reply() -> dict:
+    with open(os.path.join(HERE, "retrieve_reply.json")) as fp:
+        return json.load(fp)["retrieve_reply"]
+
+
+def main(number: int = 2000) -> None:
+    reply = load_reply()
+    entity = AtagOneEntity()
+    entity.data = reply
+    keys = list(entity.sensors)[:SENSOR_READS]
+
+    def rebuild_per_access():
+        entity.data = reply
+        for key in keys:
+            entity._build_sensor_index().get(key, 0)
+
+    def index_per_refresh():
+        entity.data = reply
+        sensors = entity.sensors
+        for key in keys:
+            sensors.get(key, 0)
+
+    before = min(timeit.repeat(rebuild_per_access, number=number, repeat=5)) / number * 1e6
+    after = min(timeit.repeat(index_per_refresh, number=number, repeat=5)) / number * 1e6
+    print(f"{len(keys)} sensor reads per refresh")
+    print(f"rebuild per access : {before:8.1f} us/refresh")
+    print(f"sensor index       : {after:8.1f} us/refresh ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
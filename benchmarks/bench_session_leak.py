@@ -0,0 +1,106 @@
+"""
+Leak check: entry reload cycles on the shared session registry
+
+Repeats what a config entry reload does with the transport (acquire the
+shared session, create an AtagOneApi, poll, close the API, release the
+session) against benchmarks/atagone_standin.py and fails when the open file
+descriptors or the traced memory keep growing.
+
+    python benchmarks/bench_session_leak.py [--cycles 1000]
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tracemalloc
+
+HERE = os.path.dirname(__file__)
+sys.path.append(HERE)
+sys.path.append(os.path.join(HERE, "..", "custom_components", "atagone"))
+
+from atagone_standin import PROFILES, AtagStandIn  # noqa: E402
+from wrapper.atagoneapi import AtagOneApi  # noqa: E402
+from wrapper.atagonesession import SessionRegistry  # noqa: E402
+
+""" Cycles run before the baseline is taken (caches, lazy imports) """
+WARMUP_CYCLES = 50
+
+""" Growth allowed over the measured cycles """
+MAX_FD_GROWTH = 0
+MAX_MEMORY_GROWTH = 256 * 1024
+
+ENTRY_ID = "entry"
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+async def reload_cycle(sessions: SessionRegistry, port: int) -> None:
+    atagapi = AtagOneApi(
+        "127.0.0.1",
+        port,
+        min_request_gap=0,
+        max_request_rate=1e9,
+        session=sessions.acquire(ENTRY_ID),
+    )
+    try:
+        await atagapi.async_update()
+    finally:
+        await atagapi.async_close()
+        await sessions.async_release(ENTRY_ID)
+
+
+async def run(cycles: int) -> None:
+    standin = AtagStandIn(PROFILES["ideal"], seed=5)
+    _, port = await standin.start()
+    sessions = SessionRegistry()
+    try:
+        for _ in range(WARMUP_CYCLES):
+            await reload_cycle(sessions, port)
+        # let the closed connectors finish their transports
+        await asyncio.sleep(0.1)
+        gc.collect()
+
+        tracemalloc.start()
+        fds_before = open_fds()
+        memory_before, _ = tracemalloc.get_traced_memory()
+        for _ in range(cycles):
+            await reload_cycle(sessions, port)
+        await asyncio.sleep(0.1)
+        gc.collect()
+        fds_after = open_fds()
+        memory_after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        await sessions.async_close()
+        await standin.stop()
+
+    fd_growth = fds_after - fds_before
+    memory_growth = memory_after - memory_before
+    print(f"entry reload cycles: {cycles} (after {WARMUP_CYCLES} warm-up cycles)")
+    print(f"  sessions created : {sessions.created}")
+    print(f"  open fds         : {fds_before} -> {fds_after}")
+    print(f"  traced memory    : {memory_before / 1024:.1f} -> {memory_after / 1024:.1f} KiB"
+          f" (peak {peak / 1024:.1f} KiB)")
+
+    if fd_growth > MAX_FD_GROWTH:
+        raise SystemExit(f"file descriptors leak: {fd_growth} more after {cycles} cycles")
+    if memory_growth > MAX_MEMORY_GROWTH:
+        raise SystemExit(f"memory leak: {memory_growth / 1024:.1f} KiB retained after {cycles} cycles")
+    print("no fd or memory growth")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Entry reload leak check")
+    parser.add_argument("--cycles", type=int, default=1000)
+    asyncio.run(run(parser.parse_args().cycles))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: memory of slotted snapshot records vs. the raw retrieve_reply dict
+
+Uses tracemalloc to report
+  * the memory retained per device (cached reply + sensor index), and
+  * the peak memory allocated while processing one poll.
+
+    python benchmarks/bench_snapshot_memory.py
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+HERE = os.path.dirname(__file__)
+sys.path.append(os.path.join(HERE, "..", "custom_components", "atagone"))
+
+from wrapper.atagoneentity import AtagOneEntity  # noqa: E402
+
+DEVICES = 100
+
+
+def dict_sensor_index(data: dict) -> dict:
+    """Sensor index as built from the raw reply dict (before snapshot records)."""
+    report = data.get("report", {})
+    sensors = {k: v for k, v in report.items() if k != "details"}
+    sensors["avg_outside_temp"] = report.get("tout_avg")
+    sensors.update(report.get("details", {}))
+    sensors.update(data.get("control", {}))
+    sensors["summer_eco_temp"] = data.get("configuration", {}).get("summer_eco_temp")
+    return sensors
+
+
+def poll_dict(text: str):
+    data = json.loads(text)["retrieve_reply"]
+    return data, dict_sensor_index(data)
+
+
+def poll_snapshot(text: str):
+    entity = AtagOneEntity()
+    entity.data = json.loads(text)["retrieve_reply"]
+    return entity
+
+
+def measure(poll, text: str):
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    kept = poll(text)
+    _, peak = tracemalloc.get_traced_memory()
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+
+    devices = [poll(text) for _ in range(DEVICES)]
+    gc.collect()
+    total, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept, devices
+    return retained - before, peak - before, (total - retained) / DEVICES
+
+
+def main() -> None:
+    with open(os.path.join(HERE, "retrieve_reply.json")) as fp:
+        text = fp.read()
+
+    print(f"{'approach':<12}{'retained B':>12}{'poll peak B':>13}{'per device B':>14}")
+    for name, poll in (("dict", poll_dict), ("snapshot", poll_snapshot)):
+        retained, peak, per_device = measure(poll, text)
+        print(f"{name:<12}{retained:>12}{peak:>13}{per_device:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark: precompiled wire payloads vs. the AtagJson/dataclass_json path
+
+Checks that both paths produce byte-for-byte identical payloads and reports
+the time per payload for each.
+
+    python benchmarks/bench_wire.py
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "custom_components", "atagone"))
+
+from wrapper import atagonewire as wire  # noqa: E402
+from wrapper.atagonejson import AtagJson, Configuration, Control, Schedules  # noqa: E402
+
+
+def reference_sections_json(sections: dict) -> str:
+    """Render a merged multi-section update through dataclass_json (reference encoder)."""
+    atagjson = AtagJson()
+    atagjson._UpdateJson()
+    if "configuration" in sections:
+        atagjson.update.update_message.configuration = Configuration(**sections["configuration"])
+    if "schedules" in sections:
+        atagjson.update.update_message.schedules = Schedules(**sections["schedules"])
+    if "control" in sections:
+        atagjson.update.update_message.control = Control(**sections["control"])
+    return atagjson.update.to_json(sort_keys=False)
+
+
+SCHEDULE = {"base_temp": 55.0, "entries": [[[6.5, 1.0], [22.0, 0.0]], [[7.0, 1.0]]]}
+
+CASES = {
+    "retrieve(127)": (lambda: AtagJson().ReportJson(), lambda: wire.retrieve_payload()),
+    "retrieve(73)": (lambda: AtagJson().ReportJson(73), lambda: wire.retrieve_payload(73)),
+    "pair": (lambda: AtagJson().PairJson(), lambda: wire.PAIR_PAYLOAD),
+    "ch_mode_temp": (
+        lambda: AtagJson().update_for("ch_mode_temp", 20.5),
+        lambda: wire.update_payload(wire.field_sections("ch_mode_temp", 20.5)),
+    ),
+    "ch_control_mode": (
+        lambda: AtagJson().update_for("ch_control_mode", 1),
+        lambda: wire.update_payload(wire.field_sections("ch_control_mode", 1)),
+    ),
+    "room_temp_offs": (
+        lambda: AtagJson().update_for("room_temp_offs", -1.5),
+        lambda: wire.update_payload(wire.field_sections("room_temp_offs", -1.5)),
+    ),
+    "create_vacation": (
+        lambda: AtagJson().create_vacation_json(830000000, 15.0, 1209600),
+        lambda: wire.update_payload(wire.vacation_sections(830000000, 15.0, 1209600)),
+    ),
+    "cancel_vacation": (
+        lambda: AtagJson().cancel_vacation_json(),
+        lambda: wire.update_payload(wire.cancel_vacation_sections()),
+    ),
+    "dhw_schedule": (
+        lambda: AtagJson().dhw_schedule_json(dict(SCHEDULE)),
+        lambda: wire.update_payload(wire.schedule_sections("dhw_schedule", dict(SCHEDULE))),
+    ),
+    "merged": (
+        lambda: reference_sections_json(
+            {
+                "configuration": {"summer_eco_temp": 18.0, "room_temp_offs": 0.5},
+                "schedules": {"dhw_schedule": dict(SCHEDULE)},
+                "control": {"ch_mode_temp": 21.0, "ch_mode": 1},
+            }
+        ),
+        lambda: wire.update_payload(
+            {
+                "configuration": {"summer_eco_temp": 18.0, "room_temp_offs": 0.5},
+                "schedules": {"dhw_schedule": dict(SCHEDULE)},
+                "control": {"ch_mode_temp": 21.0, "ch_mode": 1},
+            }
+        ),
+    ),
+}
+
+
+def main(number: int = 2000) -> None:
+    print(f"{'payload':<18}{'AtagJson us':>14}{'wire us':>12}{'speedup':>10}")
+    for name, (legacy, compiled) in CASES.items():
+        expected = legacy().encode()
+        actual = compiled()
+        if expected != actual:
+            raise SystemExit(f"{name}: payload mismatch\n  {expected!r}\n  {actual!r}")
+
+        legacy_us = min(timeit.repeat(legacy, number=number, repeat=5)) / number * 1e6
+        compiled_us = min(timeit.repeat(compiled, number=number, repeat=5)) / number * 1e6
+        print(f"{name:<18}{legacy_us:>14.2f}{compiled_us:>12.2f}{legacy_us / compiled_us:>9.1f}x")
+    print("all payloads byte-for-byte identical")
+
+
+if __name__ == "__main__":
+    main()
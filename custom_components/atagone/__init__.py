@@ -5,20 +5,25 @@ Author: herikw
 https://github.com/herikw/home-assistant-custom-components
 """
 
-from asyncio import timeout
-from .const import DOMAIN, DEFAULT_SCAN_INTERVAL_SECONDS
+from .const import (
+    DOMAIN,
+    DEFAULT_SCAN_INTERVAL_SECONDS,
+    DEFAULT_MIN_SCAN_INTERVAL_SECONDS,
+    DEFAULT_MAX_SCAN_INTERVAL_SECONDS,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+)
 from datetime import timedelta
+from functools import partial
+from ipaddress import ip_address
 from typing import Any
 import logging
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.const import Platform
-from homeassistant.helpers.update_coordinator import (
-    DataUpdateCoordinator,
-    UpdateFailed
-)
 from homeassistant.const import (
     CONF_HOST, 
     CONF_PORT,
@@ -28,7 +33,13 @@ from homeassistant.const import (
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers import device_registry as dr
 
+from .coordinator import AtagOneCoordinator, AdaptivePollInterval, async_get_poll_scheduler
+from .discovery import async_get_discovery_listener
+from .metrics import async_register_metrics_view
+from .seed import async_pop_probe_seed
+from .session import async_get_session_registry
 from .wrapper.atagoneapi import AtagOneApi
+from .wrapper.atagonediscovery import Announcement
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,50 +50,104 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up platform from a ConfigEntry."""
 
     hass.data.setdefault(DOMAIN, {})
-    hass_data = dict(entry.data)
     # Registers update listener to update config entry when options are updated.
-    unsub_options_update_listener = entry.add_update_listener(options_update_listener)
-    # Store a reference to the unsubscribe function to cleanup if an entry is unloaded.
-    hass_data["unsub_options_update_listener"] = unsub_options_update_listener
-    hass.data[DOMAIN][entry.entry_id] = hass_data
-
-    async def _async_update_data():
-        async with timeout(20):
-            try:
-                await atagapi.async_update()
-            except:
-                raise UpdateFailed
-
-        return atagapi
-    
+    entry.async_on_unload(entry.add_update_listener(options_update_listener))
+
+    sessions = async_get_session_registry(hass)
+    atagapi = AtagOneApi(
+        entry.data[CONF_HOST],
+        entry.data[CONF_PORT],
+        session=sessions.acquire(entry.entry_id),
+    )
+
+    async def _async_release_session() -> None:
+        await atagapi.async_close()
+        await sessions.async_release(entry.entry_id)
 
-    atagapi = AtagOneApi(entry.data[CONF_HOST],  entry.data[CONF_PORT])
+    entry.async_on_unload(_async_release_session)
     
     scan_interval_seconds = entry.options.get(
             CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL_SECONDS
         )
 
-    coordinator = DataUpdateCoordinator(
+    adaptive_interval = None
+    if entry.options.get(CONF_ADAPTIVE_POLLING, False):
+        adaptive_interval = AdaptivePollInterval(
+            fast=entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL_SECONDS),
+            normal=scan_interval_seconds,
+            idle=entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL_SECONDS),
+        )
+
+    coordinator = AtagOneCoordinator(
         hass,
-        _LOGGER,
-        name=DOMAIN.title(),
-        update_method=_async_update_data,
-        update_interval=timedelta(seconds=scan_interval_seconds)
+        atagapi,
+        update_interval=timedelta(seconds=scan_interval_seconds),
+        adaptive_interval=adaptive_interval,
+        poll_scheduler=async_get_poll_scheduler(hass),
+        entry_options=entry.options,
     )
 
-    await coordinator.async_config_entry_first_refresh()
+    entry.async_on_unload(coordinator.async_shutdown)
+    seed = async_pop_probe_seed(hass, entry.unique_id, entry.data[CONF_HOST], entry.data[CONF_PORT])
+    if seed is not None:
+        coordinator.async_seed(seed)
+    else:
+        await coordinator.async_config_entry_first_refresh()
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
     if entry.unique_id is None:
         hass.config_entries.async_update_entry(entry, unique_id=atagapi.id)
 
+    async_register_metrics_view(hass)
+    listener = await async_get_discovery_listener(hass)
+    entry.async_on_unload(
+        listener.add_listener(partial(_async_follow_announcement, hass, entry, coordinator))
+    )
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     return True
 
+@callback
+def _async_follow_announcement(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: AtagOneCoordinator,
+    announcement: Announcement,
+) -> None:
+    """Re-point the entry when its thermostat announces itself from a new address.
+
+    Only entries configured with an IP address follow; a hostname is left to DNS.
+    """
+    host = entry.data[CONF_HOST]
+    if announcement.device_id is None or announcement.device_id != entry.unique_id:
+        return
+    if announcement.host == host or not _is_ip_address(host):
+        return
+
+    _LOGGER.info("Atag One %s moved from %s to %s", entry.unique_id, host, announcement.host)
+    hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_HOST: announcement.host})
+    coordinator.atagapi.rebind(announcement.host)
+    hass.async_create_task(coordinator.async_refresh())
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
 async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
-    """Handle options update."""
-    
+    """Handle options update.
+
+    Entry data updates (a new host from discovery, a unique id) are applied
+    without a reload.
+    """
+    coordinator = hass.data[DOMAIN].get(config_entry.entry_id)
+    if coordinator is not None and coordinator.entry_options == dict(config_entry.options):
+        return
+
     await hass.config_entries.async_reload(config_entry.entry_id)
 
 
@@ -266,6 +266,7 @@ class AtagOneThermostat(AtagOneEntity, ClimateEntity):
         """Set new target hvac mode with optimistic update."""
         # Optimistically update the UI
         self._optimistic_hvac_mode = hvac_mode
+        self._async_track_optimistic(True)
         self.async_write_ha_state()
         _LOGGER.debug("Optimistic update for hvac_mode: %s", hvac_mode)
         
@@ -284,6 +285,7 @@ class AtagOneThermostat(AtagOneEntity, ClimateEntity):
         """Set new preset mode with optimistic update."""
         # Optimistically update the UI
         self._optimistic_preset_mode = preset_mode
+        self._async_track_optimistic(True)
         self.async_write_ha_state()
         _LOGGER.debug("Optimistic update for preset_mode: %s", preset_mode)
         
@@ -317,6 +319,7 @@ class AtagOneThermostat(AtagOneEntity, ClimateEntity):
         
         # Optimistically update the UI
         self._optimistic_target_temp = target_temp
+        self._async_track_optimistic(True)
         self.async_write_ha_state()
         _LOGGER.debug("Optimistic update for target_temperature: %s", target_temp)
         
@@ -372,4 +375,9 @@ class AtagOneThermostat(AtagOneEntity, ClimateEntity):
                 )
                 self._optimistic_target_temp = None
         
+        self._async_track_optimistic(
+            self._optimistic_hvac_mode is not None
+            or self._optimistic_preset_mode is not None
+            or self._optimistic_target_temp is not None
+        )
         super()._handle_coordinator_update()
@@ -5,21 +5,46 @@ Author: herikw
 https://github.com/herikw/home-assistant-custom-components
 
 """
+from ipaddress import ip_network
 import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.components.network import async_get_source_ip
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.selector import (
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
+)
 from homeassistant.config_entries import OptionsFlowWithConfigEntry
 from homeassistant.const import (
+    CONF_DEVICE,
     CONF_HOST, 
     CONF_PORT,
     CONF_SCAN_INTERVAL
 )
+from .discovery import (
+    DISCOVERY_SETTLE_SECONDS,
+    DISCOVERY_WAIT_SECONDS,
+    async_get_discovery_listener,
+)
+from .seed import async_store_probe_seed
+from .session import async_get_session_registry
 from .wrapper.atagoneapi import AtagOneApi
+from .wrapper.atagonescan import ScanRangeTooLarge, async_scan
 from collections import OrderedDict
-from .const import DOMAIN, DEFAULT_PORT, DEFAULT_SCAN_INTERVAL_SECONDS
+from .const import (
+    DOMAIN,
+    DEFAULT_PORT,
+    DEFAULT_SCAN_INTERVAL_SECONDS,
+    DEFAULT_MIN_SCAN_INTERVAL_SECONDS,
+    DEFAULT_MAX_SCAN_INTERVAL_SECONDS,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,6 +55,11 @@ DATA_SCHEMA = vol.Schema(
     }
 )
 
+MANUAL_ENTRY = "manual"
+SCAN_ENTRY = "scan"
+
+CONF_NETWORK = "network"
+
 class AtagConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow for Atag One"""
 
@@ -39,51 +69,76 @@ class AtagConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize the AtagOne flow."""
         self.host: str | None = None
         self.port = DEFAULT_PORT
-    
+        self._reauth_device_id: str | None = None
+        self._discovered: dict[str, str] = {}
+        self._suggested_host: str | None = None
+
     async def async_step_reauth(self, user_input=None):
         """Perform reauth upon an API authentication error."""
+        entry = self.hass.config_entries.async_get_entry(self.context.get("entry_id"))
+        if entry is not None:
+            self._reauth_device_id = entry.unique_id
         return await self.async_step_user()
-    
+
     async def async_step_user(self, user_input=None) -> FlowResult:
         """Handle a flow initialized by the user."""
-        
-        ip_address = await AtagOneApi().async_discover()
-        if ip_address is not None:
-            if user_input is None:
-                return self.async_show_form(
-                    step_id="user", 
-                    data_schema=vol.Schema(
-                        {
-                            vol.Required(CONF_HOST, default=ip_address): str,
-                            vol.Required(CONF_PORT, default=DEFAULT_PORT): vol.Coerce(int)
-                        }
-                    )   
+
+        if user_input is None:
+            listener = await async_get_discovery_listener(self.hass)
+            announcements = await listener.async_wait(
+                DISCOVERY_WAIT_SECONDS, DISCOVERY_SETTLE_SECONDS
+            )
+            ip_address = None
+            if self._reauth_device_id is not None:
+                ip_address = next(
+                    (item.host for item in announcements if item.device_id == self._reauth_device_id),
+                    None,
                 )
-        else:
-            if user_input is None:
-                return self.async_show_form(
-                    step_id="user", 
-                    data_schema=vol.Schema(
-                        {
-                            vol.Required(CONF_HOST, default=None): str,
-                            vol.Required(CONF_PORT, default=DEFAULT_PORT): vol.Coerce(int)
-                        }
-                    )   
+            else:
+                configured = self._async_current_ids()
+                self._discovered = {
+                    item.device_id: item.host
+                    for item in announcements
+                    if item.device_id and item.device_id not in configured
+                }
+                if self._discovered:
+                    return await self.async_step_pick_device()
+                self._suggested_host = next(
+                    (item.host for item in announcements if item.device_id is None), None
                 )
-            
+                return self.async_show_menu(step_id="user", menu_options=["manual", "scan"])
+            return self.async_show_form(
+                step_id="user",
+                data_schema=vol.Schema(
+                    {
+                        vol.Required(CONF_HOST, default=ip_address): str,
+                        vol.Required(CONF_PORT, default=DEFAULT_PORT): vol.Coerce(int)
+                    }
+                )
+            )
+
         errors = {}
         
         try:
             self.host = user_input[CONF_HOST]
             self.port = user_input[CONF_PORT]
             
-            atagapi = AtagOneApi(self.host, self.port)
-            
-            await atagapi.async_update()
+            sessions = async_get_session_registry(self.hass)
+            atagapi = AtagOneApi(self.host, self.port, session=sessions.acquire(self.flow_id))
+            try:
+                await atagapi.async_update()
+            finally:
+                await atagapi.async_close()
+                await sessions.async_release(self.flow_id)
             if atagapi.id:
                 _LOGGER.debug("atag ID %s", atagapi.id)
+                # the entry set up (or reloaded) next starts from this snapshot
+                if atagapi.id == self._reauth_device_id:
+                    async_store_probe_seed(self.hass, atagapi)
+                    return await self.async_create_or_update_entry(atagapi.id)
                 await self.async_set_unique_id(atagapi.id)
                 self._abort_if_unique_id_configured(updates={CONF_HOST: self.host, CONF_PORT: self.port})
+                async_store_probe_seed(self.hass, atagapi)
                 return self.async_create_entry(
                     title=atagapi.id,
                     data={
@@ -106,13 +161,111 @@ class AtagConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             step_id="user", data_schema=DATA_SCHEMA, errors=errors
         )
             
+    async def async_step_pick_device(self, user_input=None) -> FlowResult:
+        """Offer every discovered thermostat that is not configured yet.
+
+        The broadcast carries the device id, so a picked thermostat is added
+        without probing it first.
+        """
+        if user_input is not None:
+            device_id = user_input[CONF_DEVICE]
+            if device_id == MANUAL_ENTRY:
+                return await self.async_step_manual()
+            if device_id == SCAN_ENTRY:
+                return await self.async_step_scan()
+
+            self.host = self._discovered[device_id]
+            await self.async_set_unique_id(device_id)
+            self._abort_if_unique_id_configured(updates={CONF_HOST: self.host})
+            return self.async_create_entry(
+                title=device_id,
+                data={
+                    CONF_HOST: self.host,
+                    CONF_PORT: self.port,
+                },
+            )
+
+        # devices keep their label, manual and scan are translated (selector.pick_device)
+        options = [
+            SelectOptionDict(value=device_id, label=f"{device_id} ({host})")
+            for device_id, host in self._discovered.items()
+        ]
+        options.append(SelectOptionDict(value=MANUAL_ENTRY, label=MANUAL_ENTRY))
+        options.append(SelectOptionDict(value=SCAN_ENTRY, label=SCAN_ENTRY))
+        return self.async_show_form(
+            step_id="pick_device",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_DEVICE): SelectSelector(
+                        SelectSelectorConfig(options=options, translation_key="pick_device")
+                    )
+                }
+            ),
+        )
+
+    async def async_step_manual(self, user_input=None) -> FlowResult:
+        """Ask for the host; the submitted form is handled by the user step."""
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_HOST, default=self._suggested_host): str,
+                    vol.Required(CONF_PORT, default=DEFAULT_PORT): vol.Coerce(int)
+                }
+            )
+        )
+
+    async def async_step_scan(self, user_input=None) -> FlowResult:
+        """Probe a network range for thermostats when no broadcast arrives."""
+        errors = {}
+        if user_input is not None:
+            try:
+                sessions = async_get_session_registry(self.hass)
+                try:
+                    found = await async_scan(
+                        user_input[CONF_NETWORK],
+                        user_input[CONF_PORT],
+                        session=sessions.acquire(self.flow_id),
+                    )
+                finally:
+                    await sessions.async_release(self.flow_id)
+            except ScanRangeTooLarge:
+                errors[CONF_NETWORK] = "network_too_large"
+            except ValueError:
+                errors[CONF_NETWORK] = "invalid_network"
+            else:
+                self.port = user_input[CONF_PORT]
+                configured = self._async_current_ids()
+                self._discovered = {
+                    item.device_id: item.host for item in found if item.device_id not in configured
+                }
+                if self._discovered:
+                    return await self.async_step_pick_device()
+                errors["base"] = "no_devices_found"
+
+        if user_input is None:
+            source_ip = await async_get_source_ip(self.hass)
+            network = str(ip_network(f"{source_ip}/24", strict=False))
+        else:
+            network = user_input[CONF_NETWORK]
+        return self.async_show_form(
+            step_id="scan",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_NETWORK, default=network): str,
+                    vol.Required(CONF_PORT, default=self.port): vol.Coerce(int),
+                }
+            ),
+            errors=errors,
+        )
+
     async def async_create_or_update_entry(self, device_id):
         """Create or update config entry"""
         existing_entry = await self.async_set_unique_id(
             device_id, raise_on_progress=False
         )
         if existing_entry:
-            data = existing_entry.data.copy()
+            data = {**existing_entry.data, CONF_HOST: self.host, CONF_PORT: self.port}
             self.hass.config_entries.async_update_entry(existing_entry, data=data)
             await self.hass.config_entries.async_reload(existing_entry.entry_id)
             return self.async_abort(reason="reconnect_successful")
@@ -142,16 +295,40 @@ class AtagConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         
 class AtagOneOptionsFlow(OptionsFlowWithConfigEntry):
     async def async_step_init(self, user_input=None):
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            # the bounds only matter to adaptive polling
+            if user_input.get(CONF_ADAPTIVE_POLLING) and not (
+                user_input[CONF_MIN_SCAN_INTERVAL]
+                <= user_input[CONF_SCAN_INTERVAL]
+                <= user_input[CONF_MAX_SCAN_INTERVAL]
+            ):
+                errors["base"] = "invalid_interval_bounds"
+            else:
+                return self.async_create_entry(title="", data=user_input)
 
-        options = self.config_entry.options
+        options = user_input or self.config_entry.options
         scan_interval = options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL_SECONDS)
+        adaptive_polling = options.get(CONF_ADAPTIVE_POLLING, False)
+        min_scan_interval = options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL_SECONDS)
+        max_scan_interval = options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL_SECONDS)
 
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(
-                {vol.Optional(CONF_SCAN_INTERVAL, default=scan_interval): int}
+                {
+                    vol.Optional(CONF_SCAN_INTERVAL, default=scan_interval): vol.All(
+                        vol.Coerce(int), vol.Range(min=5)
+                    ),
+                    vol.Optional(CONF_ADAPTIVE_POLLING, default=adaptive_polling): bool,
+                    vol.Optional(CONF_MIN_SCAN_INTERVAL, default=min_scan_interval): vol.All(
+                        vol.Coerce(int), vol.Range(min=5)
+                    ),
+                    vol.Optional(CONF_MAX_SCAN_INTERVAL, default=max_scan_interval): vol.All(
+                        vol.Coerce(int), vol.Range(min=5)
+                    ),
+                }
             ),
+            errors=errors,
             last_step=True
-        )
\ No newline at end of file
+        )
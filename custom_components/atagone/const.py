@@ -9,6 +9,7 @@ https://github.com/herikw/home-assistant-custom-components
 """ Constants for the Atag One Integration """
 
 import logging
+import time
 from abc import ABC
 from typing import final
 
@@ -17,6 +18,7 @@ _LOGGER = logging.getLogger(__package__)
 from enum import StrEnum
 from collections.abc import Callable, Coroutine
 from .wrapper.atagoneapi import AtagOneApi
+from .wrapper.atagonebreaker import BREAKER_STATES
 from dataclasses import dataclass
 
 from homeassistant.components.sensor import (
@@ -31,6 +33,7 @@ from homeassistant.components.climate import ClimateEntityDescription
 from homeassistant.helpers.entity import EntityCategory, EntityDescription
 
 from homeassistant.const import (
+    PERCENTAGE,
     UnitOfTemperature, 
     UnitOfTime,
     UnitOfPressure,
@@ -46,6 +49,21 @@ DEFAULT_MAX_TEMP = 27
 DEFAULT_PORT = 10000
 
 DEFAULT_SCAN_INTERVAL_SECONDS: final = 60
+DEFAULT_MIN_SCAN_INTERVAL_SECONDS: final = 15
+DEFAULT_MAX_SCAN_INTERVAL_SECONDS: final = 300
+
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+
+""" Listener context of entities that follow the transport (not the snapshot) """
+TRANSPORT_BREAKER = "transport.breaker"
+TRANSPORT_METRICS = "transport.metrics"
+
+""" Listener context of entities that depend on time, woken after every successful refresh """
+EVERY_REFRESH = "refresh"
+
+CONNECTION_STATE = "connection_state"
 
 ISOLATION_LEVELS = { 
     "poor": 1,
@@ -254,9 +272,32 @@ class Schedules:
         SCHEDULE: str = "schedule"     
     
         
+class TransportItems:
+    LATENCY_P50: str = "latency_p50"
+    LATENCY_P95: str = "latency_p95"
+    ERROR_RATE: str = "error_rate"
+    LAST_SUCCESS_AGE: str = "last_success_age"
+
+
+def _latency_ms(entity, quantile: float):
+    latency = entity.coordinator.data.metrics.total.latency.quantile(quantile)
+    return None if latency is None else round(latency * 1000, 1)
+
+
+def _error_rate(entity):
+    error_rate = entity.coordinator.data.metrics.total.error_rate
+    return None if error_rate is None else round(error_rate * 100, 1)
+
+
+def _last_success_age(entity):
+    last_success = entity.coordinator.data.metrics.total.last_success
+    return None if last_success is None else round(time.monotonic() - last_success)
+
+
 @dataclass
 class AtagOneBaseEntityDescription(EntityDescription):
     """Describes AtagOne base entity."""
+    depends_on: tuple[str, ...] | None = None
         
 @dataclass
 class AtagOneClimateEntityDescription(ClimateEntityDescription, AtagOneBaseEntityDescription):
@@ -267,7 +308,15 @@ ATAG_CLIMATE_ENTITY = (
         key=f"{DOMAIN}",
         name="",
         translation_key="atag_one",
-        unit_of_measurement=UnitOfTemperature.CELSIUS
+        unit_of_measurement=UnitOfTemperature.CELSIUS,
+        depends_on=(
+            f"report.{ReportItems.ROOM_TEMP}",
+            f"report.{ReportItems.SHOW_SET_TEMP}",
+            f"report.{ReportItems.BOILER_STATUS}",
+            f"control.{ControlProperty.CH_CONTROL_MODE}",
+            f"control.{ControlProperty.CH_MODE}",
+            f"control.{ControlProperty.VACATION_DURATION}",
+        )
     )
 )
     
@@ -275,6 +324,7 @@ ATAG_CLIMATE_ENTITY = (
 class AtagOneSensorEntityDescription(SensorEntityDescription):
     """Describes AtagOne sensor entity."""
     get_native_value: Callable[[AtagOneApi], Coroutine] = None
+    depends_on: tuple[str, ...] | None = None
     
 ATAG_SENSOR_ENTITIES = (
     AtagOneSensorEntityDescription(
@@ -655,7 +705,63 @@ ATAG_SENSOR_ENTITIES = (
         translation_key=f"{ReportItems.GAS_TOTAL}",
         device_class=SensorDeviceClass.GAS,
         native_unit_of_measurement="m³",
-        state_class=SensorStateClass.TOTAL_INCREASING
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        depends_on=(EVERY_REFRESH,)
+    ),
+    AtagOneSensorEntityDescription(
+        key=CONNECTION_STATE,
+        translation_key=CONNECTION_STATE,
+        device_class=SensorDeviceClass.ENUM,
+        options=list(BREAKER_STATES),
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=True,
+        icon="mdi:lan-connect",
+        depends_on=(TRANSPORT_BREAKER,),
+        get_native_value=lambda entity, value: entity.coordinator.data.breaker.state
+    ),
+    AtagOneSensorEntityDescription(
+        key=f"{TransportItems.LATENCY_P50}",
+        translation_key=f"{TransportItems.LATENCY_P50}",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        depends_on=(TRANSPORT_METRICS,),
+        get_native_value=lambda entity, value: _latency_ms(entity, 0.5)
+    ),
+    AtagOneSensorEntityDescription(
+        key=f"{TransportItems.LATENCY_P95}",
+        translation_key=f"{TransportItems.LATENCY_P95}",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        depends_on=(TRANSPORT_METRICS,),
+        get_native_value=lambda entity, value: _latency_ms(entity, 0.95)
+    ),
+    AtagOneSensorEntityDescription(
+        key=f"{TransportItems.ERROR_RATE}",
+        translation_key=f"{TransportItems.ERROR_RATE}",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        icon="mdi:alert-circle-outline",
+        depends_on=(TRANSPORT_METRICS,),
+        get_native_value=lambda entity, value: _error_rate(entity)
+    ),
+    AtagOneSensorEntityDescription(
+        key=f"{TransportItems.LAST_SUCCESS_AGE}",
+        translation_key=f"{TransportItems.LAST_SUCCESS_AGE}",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        depends_on=(TRANSPORT_METRICS,),
+        get_native_value=lambda entity, value: _last_success_age(entity)
     )
 )
 
@@ -0,0 +1,334 @@
+"""
+Data update coordinator for the ATAG One Custom Component
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+
+"""
+
+import asyncio
+from asyncio import timeout
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from datetime import timedelta
+import logging
+import math
+import time
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed
+)
+
+from .const import DOMAIN, EVERY_REFRESH, TRANSPORT_BREAKER, TRANSPORT_METRICS
+from .wrapper.atagoneapi import AtagOneApi, AtagSeed
+from .wrapper.atagonemetrics import Histogram
+
+_LOGGER = logging.getLogger(__name__)
+
+""" Seconds a refresh may take, including retries """
+UPDATE_DEADLINE_SECONDS = 20
+
+""" Extra seconds the safety timeout allows on top of the deadline """
+UPDATE_TIMEOUT_GRACE = 5
+
+""" boiler_status & 14 values where the boiler is firing (boiler, central heating, water) """
+ACTIVE_BOILER_STATES = frozenset({8, 10, 12})
+
+""" Seconds a write keeps the fast interval """
+RECENT_WRITE_SECONDS = 120
+
+""" Inactive polls before leaving the fast interval """
+FAST_HOLD_POLLS = 3
+
+""" Seconds without activity before switching to the idle interval """
+IDLE_AFTER_SECONDS = 1800
+
+TIER_FAST = "fast"
+TIER_NORMAL = "normal"
+TIER_IDLE = "idle"
+
+""" Device polls that may run at the same time across all entries """
+MAX_CONCURRENT_POLLS = 2
+
+DATA_POLL_SCHEDULER = f"{DOMAIN}_poll_scheduler"
+
+
+class AdaptivePollInterval:
+    """Pick a fast, normal or idle poll interval from the boiler activity.
+
+    Activity (boiler firing, heating demand, hot water flowing or a recent
+    write) switches to the fast interval right away. Leaving it needs
+    FAST_HOLD_POLLS inactive polls in a row, and the idle interval is only
+    used after IDLE_AFTER_SECONDS without any activity, so a boiler that
+    cycles on and off does not make the interval flap.
+    """
+
+    def __init__(self, fast: float, normal: float, idle: float) -> None:
+        self.intervals = {TIER_FAST: fast, TIER_NORMAL: normal, TIER_IDLE: idle}
+        self.tier = TIER_NORMAL
+        self._inactive_polls = 0
+        self._last_active = time.monotonic()
+
+    @staticmethod
+    def is_active(atagapi: AtagOneApi, now: float) -> bool:
+        """Return True when the boiler is busy or the user just changed something."""
+        if atagapi.heating:
+            return True
+
+        boiler_status = atagapi.sensors.get("boiler_status")
+        if isinstance(boiler_status, int) and (boiler_status & 14) in ACTIVE_BOILER_STATES:
+            return True
+
+        dhw_flow_rate = atagapi.sensors.get("dhw_flow_rate")
+        if isinstance(dhw_flow_rate, (int, float)) and dhw_flow_rate > 0:
+            return True
+
+        return atagapi.last_write is not None and now - atagapi.last_write < RECENT_WRITE_SECONDS
+
+    def next_interval(self, atagapi: AtagOneApi, now: float | None = None) -> float:
+        """Return the interval (seconds) until the next poll."""
+        if now is None:
+            now = time.monotonic()
+
+        if self.is_active(atagapi, now):
+            self._inactive_polls = 0
+            self._last_active = now
+            self.tier = TIER_FAST
+        else:
+            self._inactive_polls += 1
+            if self.tier == TIER_FAST and self._inactive_polls < FAST_HOLD_POLLS:
+                pass
+            elif now - self._last_active >= IDLE_AFTER_SECONDS:
+                self.tier = TIER_IDLE
+            else:
+                self.tier = TIER_NORMAL
+
+        return self.intervals[self.tier]
+
+
+class PollScheduler:
+    """Spread the polls of all ATAG One entries over their interval.
+
+    Every registered coordinator gets a phase, an evenly spaced fraction of
+    its interval (member i of n polls at i/n), measured from a common
+    anchor. After each poll the coordinator asks for the delay to its next
+    phase slot, at least half and at most one and a half interval away, so
+    the phases re-balance within one interval when entries come and go.
+    Polls that still coincide (first refreshes, manual refreshes) are capped
+    at MAX_CONCURRENT_POLLS by a shared semaphore.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_POLLS) -> None:
+        self._members: list[object] = []
+        self._anchor = time.monotonic()
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.waited = 0
+
+    def register(self, member: object) -> None:
+        """Add a member; every member moves to its new phase after its next poll."""
+        if member not in self._members:
+            self._members.append(member)
+
+    def unregister(self, member: object) -> None:
+        """Remove a member."""
+        if member in self._members:
+            self._members.remove(member)
+
+    @property
+    def members(self) -> int:
+        return len(self._members)
+
+    def phase(self, member: object) -> float:
+        """Return the member's fraction of the interval (0 <= phase < 1)."""
+        if member not in self._members:
+            return 0.0
+        return self._members.index(member) / len(self._members)
+
+    def next_delay(self, member: object, interval: float, now: float | None = None) -> float:
+        """Return the seconds until the member's next phase slot."""
+        if now is None:
+            now = time.monotonic()
+        base = self._anchor + self.phase(member) * interval
+        slot = base + math.ceil((now + interval / 2 - base) / interval) * interval
+        return slot - now
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the concurrent poll slots."""
+        if self._semaphore.locked():
+            self.waited += 1
+        async with self._semaphore:
+            yield
+
+
+@callback
+def async_get_poll_scheduler(hass: HomeAssistant) -> PollScheduler:
+    """Return the poll scheduler shared by all entries."""
+    scheduler: PollScheduler | None = hass.data.get(DATA_POLL_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[DATA_POLL_SCHEDULER] = PollScheduler()
+    return scheduler
+
+
+class AtagOneCoordinator(DataUpdateCoordinator[AtagOneApi]):
+    """Coordinator that only wakes the entities whose inputs changed.
+
+    Entities register with a context: the set of snapshot sections/keys
+    ("report", "report.room_temp", ...) they depend on. After a refresh only
+    listeners whose context intersects the changes reported by the wrapper
+    are called, listeners without a context whenever anything changed. A
+    refresh the wrapper recognised as a no-op (same content fingerprint)
+    reports no changes and wakes no snapshot entity at all. Listeners whose
+    context holds EVERY_REFRESH, and listeners waiting for the device to
+    confirm an optimistic value (optimistic_listeners), are called after
+    every successful refresh regardless.
+
+    With an AdaptivePollInterval the update interval follows the boiler
+    activity instead of the fixed scan interval. With a PollScheduler each
+    refresh is moved to this entry's phase slot and waits for a free
+    concurrent poll slot. Post-write confirmation refreshes done by the
+    wrapper are dispatched the same way.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        atagapi: AtagOneApi,
+        update_interval: timedelta,
+        adaptive_interval: AdaptivePollInterval | None = None,
+        poll_scheduler: PollScheduler | None = None,
+        entry_options: Mapping[str, Any] | None = None,
+    ) -> None:
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN.title(),
+            update_interval=update_interval,
+        )
+        self.atagapi = atagapi
+        self._notified_success: bool | None = None
+        self.adaptive_interval = adaptive_interval
+        # options the entry was set up with; entry updates that keep them need no reload
+        self.entry_options = dict(entry_options or {})
+        self.poll_interval = update_interval.total_seconds()
+        self.poll_scheduler = poll_scheduler
+        if poll_scheduler is not None:
+            poll_scheduler.register(self)
+        self._remove_confirm_listener = atagapi.add_update_listener(self._handle_confirmed)
+        self._breaker_transitions = atagapi.breaker.transitions
+        self.optimistic_listeners: set[CALLBACK_TYPE] = set()
+        self.dispatch_time = Histogram()
+        self.entity_updates = 0
+
+    async def _async_update_data(self) -> AtagOneApi:
+        try:
+            if self.poll_scheduler is None:
+                await self._async_poll()
+            else:
+                async with self.poll_scheduler.slot():
+                    await self._async_poll()
+
+            if self.adaptive_interval is not None:
+                self._adapt_interval()
+        finally:
+            self._schedule_next_poll()
+        return self.atagapi
+
+    async def _async_poll(self) -> None:
+        deadline = self.atagapi.deadline_in(UPDATE_DEADLINE_SECONDS)
+        async with timeout(UPDATE_DEADLINE_SECONDS + UPDATE_TIMEOUT_GRACE):
+            try:
+                await self.atagapi.async_update(deadline=deadline)
+            except Exception as err:
+                raise UpdateFailed(err) from err
+            finally:
+                self._async_dispatch_transport()
+
+    def _adapt_interval(self) -> None:
+        """Switch the poll interval to the one of the current activity tier."""
+        tier = self.adaptive_interval.tier
+        seconds = self.adaptive_interval.next_interval(self.atagapi)
+        if tier != self.adaptive_interval.tier:
+            _LOGGER.debug(
+                "Poll interval %s -> %s (%ss)", tier, self.adaptive_interval.tier, seconds
+            )
+        self.poll_interval = seconds
+
+    def _schedule_next_poll(self) -> None:
+        """Set the delay of the next refresh, aligned to the phase slot when scheduled."""
+        seconds = self.poll_interval
+        if self.poll_scheduler is not None:
+            seconds = self.poll_scheduler.next_delay(self, seconds)
+        self.update_interval = timedelta(seconds=seconds)
+
+    @callback
+    def _async_dispatch_transport(self) -> None:
+        """Update the transport entities after every refresh.
+
+        Consecutive failed refreshes don't call the listeners, so the
+        transport metrics and breaker transitions are dispatched here, also
+        during an outage. Breaker entities only when the state changed.
+        """
+        topics = {TRANSPORT_METRICS}
+        transitions = self.atagapi.breaker.transitions
+        if transitions != self._breaker_transitions:
+            self._breaker_transitions = transitions
+            topics.add(TRANSPORT_BREAKER)
+
+        for update_callback, context in list(self._listeners.values()):
+            if context is not None and not context.isdisjoint(topics):
+                self.entity_updates += 1
+                update_callback()
+
+    @callback
+    def async_seed(self, seed: AtagSeed) -> None:
+        """Use the snapshot of a config flow probe as the first refresh.
+
+        Replaces async_config_entry_first_refresh for an entry that was just
+        created or re-authenticated, so setup needs no device round trip.
+        """
+        self.atagapi.seed_from(seed)
+        if self.adaptive_interval is not None:
+            self._adapt_interval()
+        self._schedule_next_poll()
+        self.async_set_updated_data(self.atagapi)
+
+    @callback
+    def _handle_confirmed(self) -> None:
+        """Dispatch the sections a post-write confirmation refresh merged.
+
+        The refresh timer is left alone, so a write neither postpones the
+        next poll nor moves it off this entry's phase slot.
+        """
+        self.async_update_listeners()
+
+    async def async_shutdown(self) -> None:
+        """Stop listening for write confirmations and leave the poll scheduler."""
+        self._remove_confirm_listener()
+        if self.poll_scheduler is not None:
+            self.poll_scheduler.unregister(self)
+        await super().async_shutdown()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the listeners whose sections changed."""
+        changes = self.atagapi.pop_changes()
+        started = time.perf_counter()
+        if changes is None or self.last_update_success != self._notified_success:
+            self._notified_success = self.last_update_success
+            self.entity_updates += len(self._listeners)
+            super().async_update_listeners()
+        else:
+            topics = changes | {EVERY_REFRESH} if self.last_update_success else changes
+            for update_callback, context in list(self._listeners.values()):
+                if (
+                    (context is None and changes)
+                    or (context is not None and not context.isdisjoint(topics))
+                    or update_callback in self.optimistic_listeners
+                ):
+                    self.entity_updates += 1
+                    update_callback()
+        self.dispatch_time.observe(time.perf_counter() - started)
@@ -0,0 +1,43 @@
+"""
+Background discovery for the ATAG One Custom Component
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+
+"""
+
+from __future__ import annotations
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .const import DOMAIN
+from .wrapper.atagonediscovery import DiscoveryListener
+
+DATA_DISCOVERY = f"{DOMAIN}_discovery"
+
+""" Seconds the config flow waits for a broadcast when none is cached """
+DISCOVERY_WAIT_SECONDS = 10
+
+""" Seconds the config flow keeps listening for other thermostats after the first broadcast """
+DISCOVERY_SETTLE_SECONDS = 2
+
+
+async def async_get_discovery_listener(hass: HomeAssistant) -> DiscoveryListener:
+    """Return the shared discovery listener, starting it on first use.
+
+    The listener keeps running until Home Assistant stops, so config and
+    reauth flows read recent broadcasts from its cache.
+    """
+    listener: DiscoveryListener | None = hass.data.get(DATA_DISCOVERY)
+    if listener is None:
+        listener = hass.data[DATA_DISCOVERY] = DiscoveryListener()
+
+        @callback
+        def _async_stop(event: Event) -> None:
+            listener.stop()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop)
+
+    await listener.async_start()
+    return listener
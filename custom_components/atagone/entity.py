@@ -7,8 +7,10 @@ https://github.com/herikw/home-assistant-custom-components
 """
 
 from .const import DOMAIN, AtagOneBaseEntityDescription
+from .wrapper.atagonesnapshot import SNAPSHOT_SECTIONS
 import logging
 
+from homeassistant.core import callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
@@ -25,10 +27,27 @@ class AtagOneEntity(CoordinatorEntity):
         coordinator: DataUpdateCoordinator,
         description: AtagOneBaseEntityDescription,
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=entity_context(description))
         self.domain = DOMAIN.title()
         self.entity_description: AtagOneBaseEntityDescription = description
 
+    @callback
+    def _async_track_optimistic(self, pending: bool) -> None:
+        """Wake this entity after every refresh while an optimistic value is pending.
+
+        A write the thermostat rejects or ignores leaves the entity's own keys
+        unchanged, so without this it would never reconcile.
+        """
+        if pending:
+            self.coordinator.optimistic_listeners.add(self._handle_coordinator_update)
+        else:
+            self.coordinator.optimistic_listeners.discard(self._handle_coordinator_update)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop the per-refresh wake-ups of a pending optimistic value."""
+        self._async_track_optimistic(False)
+        await super().async_will_remove_from_hass()
+
     @property
     def data(self):
         return self.coordinator.data
@@ -54,3 +73,15 @@ class AtagOneEntity(CoordinatorEntity):
             sw_version=self.data.firmware_version,
         )
 
+
+
+def entity_context(description) -> frozenset[str]:
+    """Return the snapshot sections/keys an entity depends on.
+
+    Descriptions can list them in depends_on, otherwise the entity depends on
+    its key in whichever section carries it.
+    """
+    depends_on = getattr(description, "depends_on", None)
+    if depends_on is not None:
+        return frozenset(depends_on)
+    return frozenset(f"{section}.{description.key}" for section in SNAPSHOT_SECTIONS)
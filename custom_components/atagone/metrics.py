@@ -0,0 +1,182 @@
+"""
+OpenMetrics exposition for the ATAG One Custom Component
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+import time
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import AtagOneCoordinator
+from .wrapper.atagonebreaker import BREAKER_STATES
+from .wrapper.atagonemetrics import Histogram
+from .wrapper.atagonequeue import PRIORITY_NAMES
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+DATA_METRICS_VIEW = f"{DOMAIN}_metrics_view"
+
+
+class AtagOneMetricsView(HomeAssistantView):
+    """Serve the wrapper counters of every loaded entry in OpenMetrics text format.
+
+    Only counters kept in memory are rendered, the thermostat is never
+    contacted.
+    """
+
+    url = f"/api/{DOMAIN}/metrics"
+    name = f"api:{DOMAIN}:metrics"
+    requires_auth = True
+
+    async def get(self, request: web.Request) -> web.Response:
+        hass: HomeAssistant = request.app["hass"]
+        coordinators = [
+            (entry.entry_id, coordinator)
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if isinstance(coordinator := hass.data.get(DOMAIN, {}).get(entry.entry_id), AtagOneCoordinator)
+        ]
+        return web.Response(
+            body=render_openmetrics(coordinators).encode(),
+            headers={"Content-Type": CONTENT_TYPE},
+        )
+
+
+def async_register_metrics_view(hass: HomeAssistant) -> None:
+    """Register the metrics view once per Home Assistant instance."""
+    if hass.data.get(DATA_METRICS_VIEW):
+        return
+    hass.http.register_view(AtagOneMetricsView)
+    hass.data[DATA_METRICS_VIEW] = True
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str]) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Family:
+    """Collect the samples of one metric family."""
+
+    def __init__(self, lines: list[str], name: str, kind: str, help_text: str) -> None:
+        self.name = name
+        self.lines = lines
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"# HELP {name} {help_text}")
+
+    def sample(self, suffix: str, labels: dict[str, str], value: float) -> None:
+        self.lines.append(f"{self.name}{suffix}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, labels: dict[str, str], histogram: Histogram) -> None:
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, histogram.counts):
+            cumulative += count
+            self.sample("_bucket", {**labels, "le": repr(float(bound))}, cumulative)
+        self.sample("_bucket", {**labels, "le": "+Inf"}, histogram.count)
+        self.sample("_count", labels, histogram.count)
+        self.sample("_sum", labels, histogram.sum)
+
+
+def render_openmetrics(coordinators: Iterable[tuple[str, AtagOneCoordinator]]) -> str:
+    """Render the counters of the given (entry_id, coordinator) pairs."""
+    lines: list[str] = []
+    entries = [
+        ({"entry": entry_id, "device": str(coordinator.atagapi.id)}, coordinator)
+        for entry_id, coordinator in coordinators
+    ]
+    now = time.monotonic()
+
+    def family(name: str, kind: str, help_text: str, render: Callable) -> None:
+        metric = _Family(lines, name, kind, help_text)
+        for labels, coordinator in entries:
+            render(metric, labels, coordinator.atagapi, coordinator)
+
+    def per_path(attribute: str):
+        def render(metric, labels, atagapi, coordinator):
+            for path, path_metrics in atagapi.metrics.paths.items():
+                metric.sample("_total", {**labels, "path": path}, getattr(path_metrics, attribute))
+        return render
+
+    family("atagone_requests", "counter", "Request attempts sent to the thermostat.", per_path("requests"))
+    family("atagone_request_successes", "counter", "Attempts that returned a valid reply.", per_path("successes"))
+    family("atagone_request_failures", "counter", "Attempts that failed (error status, timeout, connection error).", per_path("failures"))
+    family("atagone_request_retries", "counter", "Attempts that were retries.", per_path("retries"))
+    family("atagone_request_bytes", "counter", "Request body bytes sent.", per_path("bytes_sent"))
+    family("atagone_response_bytes", "counter", "Response body bytes received.", per_path("bytes_received"))
+
+    def responses(metric, labels, atagapi, coordinator):
+        for path, path_metrics in atagapi.metrics.paths.items():
+            for status, count in sorted(path_metrics.statuses.items()):
+                metric.sample("_total", {**labels, "path": path, "status": str(status)}, count)
+
+    family("atagone_responses", "counter", "Responses received per HTTP status.", responses)
+
+    def latency(metric, labels, atagapi, coordinator):
+        for path, path_metrics in atagapi.metrics.paths.items():
+            metric.histogram({**labels, "path": path}, path_metrics.latency)
+
+    family("atagone_request_latency_seconds", "histogram", "Request latency.", latency)
+
+    def last_success(metric, labels, atagapi, coordinator):
+        last = atagapi.metrics.total.last_success
+        if last is not None:
+            metric.sample("", labels, now - last)
+
+    family("atagone_last_success_age_seconds", "gauge", "Seconds since the last successful request.", last_success)
+
+    def breaker_state(metric, labels, atagapi, coordinator):
+        for state in BREAKER_STATES:
+            metric.sample("", {**labels, "atagone_breaker_state": state}, int(atagapi.breaker.state == state))
+
+    family("atagone_breaker_state", "stateset", "Circuit breaker state.", breaker_state)
+    family(
+        "atagone_breaker_transitions", "counter", "Circuit breaker state transitions.",
+        lambda metric, labels, atagapi, coordinator: metric.sample("_total", labels, atagapi.breaker.transitions),
+    )
+    family(
+        "atagone_breaker_rejected", "counter", "Requests refused while the breaker was open.",
+        lambda metric, labels, atagapi, coordinator: metric.sample("_total", labels, atagapi.breaker.rejected),
+    )
+
+    def queue_wait(metric, labels, atagapi, coordinator):
+        for priority, histogram in atagapi.queue_wait_time.items():
+            metric.histogram({**labels, "priority": PRIORITY_NAMES.get(priority, str(priority))}, histogram)
+
+    family("atagone_queue_wait_seconds", "histogram", "Time requests waited for the request slot.", queue_wait)
+    family(
+        "atagone_throttle_delay_seconds", "histogram", "Time requests were held by admission control.",
+        lambda metric, labels, atagapi, coordinator: metric.histogram(labels, atagapi.throttle_delay),
+    )
+
+    def refreshes(metric, labels, atagapi, coordinator):
+        metric.sample("_total", {**labels, "result": "dispatched"}, atagapi.refreshes_dispatched)
+        metric.sample("_total", {**labels, "result": "skipped"}, atagapi.refreshes_skipped)
+
+    family("atagone_refreshes", "counter", "Merged replies, dispatched or skipped as unchanged.", refreshes)
+    family(
+        "atagone_refresh_dispatch_seconds", "histogram", "Time spent dispatching a refresh to the entities.",
+        lambda metric, labels, atagapi, coordinator: metric.histogram(labels, coordinator.dispatch_time),
+    )
+    family(
+        "atagone_entity_updates", "counter", "Entity update callbacks (state writes) triggered by the coordinator.",
+        lambda metric, labels, atagapi, coordinator: metric.sample("_total", labels, coordinator.entity_updates),
+    )
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
@@ -67,6 +67,7 @@ class AtagOneNumber(AtagOneEntity, NumberEntity):
             raise ValueError(f"Value {value} out of range")
 
         self._optimistic_native_value = value
+        self._async_track_optimistic(True)
         self.async_write_ha_state()
         _LOGGER.debug(
             "Optimistic update for %s: %s",
@@ -113,5 +114,5 @@ class AtagOneNumber(AtagOneEntity, NumberEntity):
                     )
                     self._optimistic_native_value = None
         
-        super()._handle_coordinator_update()
+        self._async_track_optimistic(self._optimistic_native_value is not None)
         super()._handle_coordinator_update()
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Probe snapshots handed from the config flow to entry setup for the ATAG One Custom Component
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+
+"""
+
+from __future__ import annotations
+
+import time
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .wrapper.atagoneapi import AtagOneApi, AtagSeed
+
+DATA_PROBE_SEEDS = f"{DOMAIN}_probe_seeds"
+
+""" Seconds a probe snapshot may be used to seed a new entry """
+SEED_MAX_AGE_SECONDS = 60
+
+
+@callback
+def async_store_probe_seed(hass: HomeAssistant, atagapi: AtagOneApi) -> None:
+    """Keep the snapshot of a config flow probe for the entry it creates or reloads.
+
+    Only the snapshot, fingerprints and fetch times are kept, not the probe itself.
+    """
+    seed = atagapi.export_seed()
+    if atagapi.id is None or seed is None:
+        return
+    seeds = _async_fresh_seeds(hass)
+    seeds[atagapi.id] = (time.monotonic(), seed)
+
+
+@callback
+def async_pop_probe_seed(
+    hass: HomeAssistant, unique_id: str | None, host: str, port: int
+) -> AtagSeed | None:
+    """Return the probe seed of this thermostat when it is recent and used the same address.
+
+    A seed is used at most once.
+    """
+    seeds = _async_fresh_seeds(hass)
+    if unique_id is None or unique_id not in seeds:
+        return None
+    _, seed = seeds.pop(unique_id)
+    if seed.host != host or seed.port != port:
+        return None
+    return seed
+
+
+@callback
+def _async_fresh_seeds(hass: HomeAssistant) -> dict[str, tuple[float, AtagSeed]]:
+    """Return the stored seeds after dropping the ones older than SEED_MAX_AGE_SECONDS."""
+    seeds: dict[str, tuple[float, AtagSeed]] = hass.data.setdefault(DATA_PROBE_SEEDS, {})
+    now = time.monotonic()
+    for device_id, (probed, _) in list(seeds.items()):
+        if now - probed > SEED_MAX_AGE_SECONDS:
+            del seeds[device_id]
+    return seeds
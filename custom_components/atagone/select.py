@@ -90,6 +90,7 @@ class AtagOneSelect(AtagOneEntity, SelectEntity):
         
         # Optimistically update the UI
         self._optimistic_option = option
+        self._async_track_optimistic(True)
         self.async_write_ha_state()
         _LOGGER.debug("Optimistic update for %s: %s", funct, option)
         
@@ -123,5 +124,5 @@ class AtagOneSelect(AtagOneEntity, SelectEntity):
                 )
                 self._optimistic_option = None
         
-        super()._handle_coordinator_update()
+        self._async_track_optimistic(self._optimistic_option is not None)
         super()._handle_coordinator_update()
@@ -21,6 +21,7 @@ from .const import (
     _LOGGER,
     ATAG_SENSOR_ENTITIES,
     BOILER_STATES,
+    CONNECTION_STATE,
     WEATHER_STATES,
     AtagOneSensorEntityDescription,
 )
@@ -51,6 +52,7 @@ class AtagOneSensor(AtagOneEntity, RestoreEntity, SensorEntity):
 
         # Only used for gas_total
         self._last_update: datetime | None = None
+        self._last_flow: float | None = None
         self._attr_native_value: float | None = None
 
     async def async_added_to_hass(self) -> None:
@@ -88,43 +90,36 @@ class AtagOneSensor(AtagOneEntity, RestoreEntity, SensorEntity):
             super()._handle_coordinator_update()
             return
 
-        flow = self.coordinator.data.sensors.get("power_cons")
-        if flow is None:
+        if not self.coordinator.last_update_success:
             return
 
+        # integrate the flow that held since the previous refresh (m³/h)
         now = dt_util.utcnow()
-
-        if self._last_update is None:
-            self._last_update = now
-            return
-
-        dt_seconds = (now - self._last_update).total_seconds()
+        if self._last_update is not None and self._last_flow is not None:
+            dt_seconds = (now - self._last_update).total_seconds()
+            if dt_seconds > 0:
+                if self._attr_native_value is None:
+                    self._attr_native_value = 0.0
+                self._attr_native_value += self._last_flow * dt_seconds / 3600.0
         self._last_update = now
 
-        if dt_seconds <= 0:
-            return
-
-        if self._attr_native_value is None:
-            self._attr_native_value = 0.0
-
         try:
-            flow_val = max(float(flow), 0.0)  # m³/h
+            self._last_flow = max(float(self.coordinator.data.sensors.get("power_cons")), 0.0)
         except (ValueError, TypeError):
-            return
-
-        delta_m3 = flow_val * dt_seconds / 3600.0
-        self._attr_native_value += delta_m3
+            self._last_flow = None
 
         self.async_write_ha_state()
 
 
     @property
     def extra_state_attributes(self):
-        """Persist last_update (gas_total only)."""
+        """Persist last_update (gas_total only), expose the breaker details (connection_state)."""
         if self.entity_description.key == "gas_total":
             return {
                 "last_update": self._last_update.isoformat() if self._last_update else None
             }
+        if self.entity_description.key == CONNECTION_STATE:
+            return self.coordinator.data.breaker.as_dict()
         return None
 
     @property
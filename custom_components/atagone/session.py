@@ -0,0 +1,36 @@
+"""
+Shared aiohttp session for the ATAG One Custom Component
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+
+"""
+
+from __future__ import annotations
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .const import DOMAIN
+from .wrapper.atagonesession import SessionRegistry
+
+DATA_SESSIONS = f"{DOMAIN}_sessions"
+
+
+@callback
+def async_get_session_registry(hass: HomeAssistant) -> SessionRegistry:
+    """Return the session registry of this Home Assistant instance.
+
+    Config entries (and config flows while probing) acquire the shared
+    session by id and release it when they unload; the session is closed
+    after the last release, or when Home Assistant closes.
+    """
+    registry: SessionRegistry | None = hass.data.get(DATA_SESSIONS)
+    if registry is None:
+        registry = hass.data[DATA_SESSIONS] = SessionRegistry()
+
+        async def _async_close(event: Event) -> None:
+            await registry.async_close()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+    return registry
@@ -49,6 +49,7 @@ class AtagOneSwitch(AtagOneEntity, SwitchEntity):
     async def async_turn_on(self, **kwargs):
         """Turn the entity on with optimistic update."""
         self._optimistic_is_on = True
+        self._async_track_optimistic(True)
         self.async_write_ha_state()
         _LOGGER.debug("Optimistic update for %s: on", self.entity_description.key)
         
@@ -65,6 +66,7 @@ class AtagOneSwitch(AtagOneEntity, SwitchEntity):
     async def async_turn_off(self, **kwargs):
         """Turn the entity off with optimistic update."""
         self._optimistic_is_on = False
+        self._async_track_optimistic(True)
         self.async_write_ha_state()
         _LOGGER.debug("Optimistic update for %s: off", self.entity_description.key)
         
@@ -100,4 +102,5 @@ class AtagOneSwitch(AtagOneEntity, SwitchEntity):
                 )
                 self._optimistic_is_on = None
         
+        self._async_track_optimistic(self._optimistic_is_on is not None)
         super()._handle_coordinator_update()
\ No newline at end of file
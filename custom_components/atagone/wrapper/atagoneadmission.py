@@ -0,0 +1,131 @@
+"""
+Admission control for the ATAG One API wrapper
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import asyncio
+import logging
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+from .atagonemetrics import Histogram
+
+_LOGGER = logging.getLogger("atagoneapi")
+
+""" Seconds between the start of two requests to the same thermostat """
+DEFAULT_MIN_GAP = 0.2
+
+""" Sustained requests per second and the burst allowed on top of it """
+DEFAULT_MAX_RATE = 2.0
+DEFAULT_BURST = 4
+
+
+class AdmissionRefused(Exception):
+    """The request would have to wait longer than it is allowed to."""
+
+    def __init__(self, delay: float):
+        super().__init__(delay)
+        self.delay = delay
+
+
+class AdmissionController:
+    """Pace the requests sent to one thermostat.
+
+    Requests are admitted one at a time, at least min_gap seconds apart and
+    at most max_rate per second on average (token bucket with burst). Reads
+    and writes of every AtagOneApi talking to the same device share it, see
+    admission_controller().
+    """
+
+    def __init__(
+        self,
+        min_gap: float = DEFAULT_MIN_GAP,
+        max_rate: float = DEFAULT_MAX_RATE,
+        burst: int = DEFAULT_BURST,
+    ):
+        self.min_gap = min_gap
+        self.max_rate = max_rate
+        self.burst = burst
+        self._lock = asyncio.Lock()
+        self._tokens = float(burst)
+        self._refilled: Optional[float] = None
+        self._last_start: Optional[float] = None
+        self.admitted = 0
+        self.throttled = 0
+        self.delay = Histogram()
+
+    def _wait_time(self, now: float) -> float:
+        if self._refilled is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.max_rate)
+        self._refilled = now
+
+        wait = 0.0
+        if self._last_start is not None:
+            wait = self._last_start + self.min_gap - now
+        if self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) / self.max_rate)
+        return max(wait, 0.0)
+
+    async def admit(self, max_wait: Optional[float] = None) -> float:
+        """Wait until the next request may start and return the throttle delay.
+
+        Raises AdmissionRefused when that takes longer than max_wait seconds.
+        """
+        loop = asyncio.get_running_loop()
+        enqueued = loop.time()
+        async with self._lock:
+            wait = self._wait_time(loop.time())
+            waited = loop.time() - enqueued
+            if max_wait is not None and waited + wait > max_wait:
+                raise AdmissionRefused(waited + wait)
+            if wait:
+                await asyncio.sleep(wait)
+
+            now = loop.time()
+            self._wait_time(now)
+            self._tokens -= 1
+            self._last_start = now
+
+        delay = now - enqueued
+        self.admitted += 1
+        self.delay.observe(delay)
+        if wait:
+            self.throttled += 1
+            _LOGGER.debug("Request throttled for %.3fs", delay)
+        return delay
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return admitted/throttled counts and the throttle delay summary."""
+        return {
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "delay": self.delay.as_dict(),
+        }
+
+
+_CONTROLLERS: "weakref.WeakValueDictionary[Tuple[str, int], AdmissionController]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def admission_controller(
+    host: Optional[str],
+    port: Optional[int],
+    min_gap: float = DEFAULT_MIN_GAP,
+    max_rate: float = DEFAULT_MAX_RATE,
+) -> AdmissionController:
+    """Return the controller shared by everything talking to host:port.
+
+    The pacing of an existing controller is updated to the given values.
+    """
+    key = (host, port)
+    controller = _CONTROLLERS.get(key)
+    if controller is None:
+        controller = AdmissionController(min_gap, max_rate)
+        _CONTROLLERS[key] = controller
+    else:
+        controller.min_gap = min_gap
+        controller.max_rate = max_rate
+    return controller
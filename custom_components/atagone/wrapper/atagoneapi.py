@@ -5,32 +5,82 @@ Author: herikw
 https://github.com/herikw/home-assistant-custom-components
 """
 
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import aiohttp
 import asyncio
-import atexit
 import logging
+import time
 from http import HTTPStatus
 from .atagoneentity import AtagOneEntity
 
-from socket import AF_INET, SOCK_DGRAM, SO_REUSEADDR, SOL_SOCKET, socket, timeout
 
-from .atagonejson import AtagJson
+from .atagonejson import (
+    MESSAGE_INFO_CONTROL,
+    MESSAGE_INFO_SCHEDULES,
+    MESSAGE_INFO_CONFIGURATION,
+    MESSAGE_INFO_REPORT,
+    MESSAGE_INFO_STATUS,
+    MESSAGE_INFO_WIFISCAN,
+    MESSAGE_INFO_REPORT_DETAILS,
+    MESSAGE_INFO_ALL,
+    MESSAGE_INFO_SECTIONS,
+)
+from .atagonesnapshot import AtagSnapshot, UNFINGERPRINTED, section_fingerprint
+from .atagonescheduler import RetrieveScheduler, DEFAULT_SLOW_INTERVAL
+from .atagonewriter import WriteCoalescer, DEFAULT_WRITE_WINDOW
+from .atagonequeue import (
+    RequestQueue,
+    RequestPreempted,
+    SlotDeadlineExceeded,
+    PRIORITY_WRITE,
+    PRIORITY_CONFIRM,
+    PRIORITY_POLL,
+)
+from .atagoneconfirm import ConfirmationRefresh, DEFAULT_CONFIRM_DELAY
+from .atagonebreaker import CircuitBreaker, STATE_HALF_OPEN
+from .atagonemetrics import Histogram, RttEstimator, TransportMetrics
+from .atagonerecord import (
+    ERROR_CONNECTION,
+    ERROR_TIMEOUT,
+    ReplaySession,
+    TraceRecorder,
+)
+from .atagonediscovery import (
+    DEFAULT_DISCOVERY_WINDOW,
+    Announcement,
+    DiscoveryListener,
+    async_discover,
+)
+from .atagonesession import SESSION_TIMEOUT, create_session
+from .atagoneadmission import (
+    AdmissionRefused,
+    admission_controller,
+    DEFAULT_MIN_GAP,
+    DEFAULT_MAX_RATE,
+)
+from . import atagonewire as wire
 
 
 BASE_URL = "http://{0}:{1}{2}"
 READ_PATH = "/retrieve"
 UPDATE_PATH = "/update"
 PAIR_PATH = "/pair_message"
-MESSAGE_INFO_CONTROL = 1
-MESSAGE_INFO_SCHEDULES = 2
-MESSAGE_INFO_CONFIGURATION = 4
-MESSAGE_INFO_REPORT = 8
-MESSAGE_INFO_STATUS = 16
-MESSAGE_INFO_WIFISCAN = 32  
-MESSAGE_INFO_EXTRA = 64
-MESSAGE_INFO_REPORT_DETAILS = 64
+
+""" Info bits to refetch after a write touched a section of the update message
+(a report without the details bit replaces report.details with nothing) """
+UPDATE_SECTION_INFO = {
+    "control": MESSAGE_INFO_CONTROL | MESSAGE_INFO_REPORT | MESSAGE_INFO_REPORT_DETAILS,
+    "configuration": MESSAGE_INFO_CONFIGURATION,
+    "schedules": MESSAGE_INFO_SCHEDULES | MESSAGE_INFO_CONTROL,
+}
+
+""" Seconds an attempt needs at least; attempts that would get less are not started """
+MIN_ATTEMPT_TIME = 1.0
+
+""" Seconds async_discover waits for the first broadcast """
+DISCOVERY_TIMEOUT = 30
 
 _LOGGER = logging.getLogger("atagoneapi")
 
@@ -39,22 +89,46 @@ class AtagStatusException(Exception):
     
 class AtagConnectException(Exception):
     """ Atag Connection Exception """
-    
-class AtagDiscovery(asyncio.DatagramProtocol):
-    """Atag Datagram Protocol Discovery class """
-    
-    def connection_made(self, transport):
-        self.transport = transport
-        self.data = asyncio.Future()
 
-    def datagram_received(self, data, addr):
-        if not self.data.done():
-            self.data.set_result([data, addr])
+class AtagCircuitOpenException(AtagConnectException):
+    """ Request refused because the circuit breaker is open """
 
+@dataclass(frozen=True)
+class AtagSeed:
+    """What a retrieve left behind, enough to start another API from it.
+
+    The snapshot is immutable and shared; the rest are copies.
+    """
+    host: Optional[str]
+    port: Optional[int]
+    snapshot: AtagSnapshot
+    fingerprints: Dict[str, int]
+    fetch_times: Dict[int, float]
+    heating: bool
+
+class AtagDeadlineExceeded(AtagConnectException):
+    """ The request could not complete before its deadline """
+
+    def __init__(self, message: str, attempted: bool = False):
+        super().__init__(message)
+        self.attempted = attempted
+    
 class AtagOneApi(AtagOneEntity):
     """Wrapper class to the Atag One Local API"""
 
-    def __init__(self, host: Optional[str] = None, port: Optional[int] = 10000):
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = 10000,
+        slow_poll_interval: float = DEFAULT_SLOW_INTERVAL,
+        write_window: float = DEFAULT_WRITE_WINDOW,
+        confirm_delay: float = DEFAULT_CONFIRM_DELAY,
+        min_request_gap: float = DEFAULT_MIN_GAP,
+        max_request_rate: float = DEFAULT_MAX_RATE,
+        record_path: Optional[str] = None,
+        replay: Optional[ReplaySession] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+    ):
         self.data = None
         self.paired = False
         self.heating = False
@@ -62,28 +136,47 @@ class AtagOneApi(AtagOneEntity):
         self.host = host
         self.client = None
 
-        self._session: Optional[aiohttp.ClientSession] = None
-        self._session_timeout = aiohttp.ClientTimeout(total=15)
-        self._request_lock = asyncio.Lock()
-        atexit.register(self._close)
-
-    async def async_discover(self):
+        self._session = session
+        self._owns_session = session is None
+        self._session_timeout = aiohttp.ClientTimeout(total=SESSION_TIMEOUT)
+        self._queue = RequestQueue()
+        self._pending_polls: Dict[Tuple[str, bytes], asyncio.Future] = {}
+        self._scheduler = RetrieveScheduler(slow_poll_interval)
+        self._writer = WriteCoalescer(self._async_send_update, write_window)
+        self._confirm = ConfirmationRefresh(self._async_confirm, confirm_delay)
+        self._update_listeners: List[Callable[[], None]] = []
+        self.breaker = CircuitBreaker()
+        self._admission = admission_controller(host, port, min_request_gap, max_request_rate)
+        self.metrics = TransportMetrics()
+        self._rtt: Dict[str, RttEstimator] = {
+            path: RttEstimator(ceiling=self._session_timeout.total)
+            for path in (READ_PATH, UPDATE_PATH, PAIR_PATH)
+        }
+        self._fingerprints: Dict[str, int] = {}
+        self.refreshes_skipped = 0
+        self.refreshes_dispatched = 0
+        self.last_write: Optional[float] = None
+        self.recorder: Optional[TraceRecorder] = TraceRecorder(record_path) if record_path else None
+        self._replay = replay
+
+    async def async_discover(self) -> Optional[str]:
         """ find the atag one thermostat on the local network """
-        addr = None
-
-        loop = asyncio.get_running_loop()
-        transport, protocol = await loop.create_datagram_endpoint(
-            lambda: AtagDiscovery(),
-            local_addr=("0.0.0.0", 11000),
-        )
+        listener = DiscoveryListener()
+        if not await listener.async_start():
+            return None
         try:
-            _, (addr, _) = await asyncio.wait_for(protocol.data, timeout=30)
-        except asyncio.TimeoutError:
-            _LOGGER.debug("Discovery timed out - no ATAG One detected")
+            announcements = await listener.async_wait(DISCOVERY_TIMEOUT)
         finally:
-            transport.close()
+            listener.stop()
+
+        if not announcements:
+            _LOGGER.debug("Discovery timed out - no ATAG One detected")
+            return None
+        return announcements[0].host
 
-        return addr
+    async def async_discover_all(self, window: float = DEFAULT_DISCOVERY_WINDOW) -> List[Announcement]:
+        """ find every atag one thermostat on the local network, one entry per device """
+        return await async_discover(window)
     
     async def async_create_vacation(
         self, 
@@ -111,33 +204,18 @@ class AtagOneApi(AtagOneEntity):
         heat_temp = float(heat_temp) if heat_temp is not None else 20.0
         duration = end_dt_epoch - start_dt_epoch
 
-        json_payload = AtagJson().create_vacation_json(start_dt_epoch, heat_temp, duration)
-        if json_payload is not None:
-            response = await self._async_send_request(UPDATE_PATH, json_payload)
-            if response:
-                return True
-
-        return False
+        return await self._writer.async_write(
+            wire.vacation_sections(start_dt_epoch, heat_temp, duration)
+        )
 
     async def async_cancel_vacation(self) -> bool:
         """cancel vacation on the Atag One"""
                 
-        json_payload = AtagJson().cancel_vacation_json()
-        response = await self._async_send_request(UPDATE_PATH, json_payload)
-        if response:
-            return True
-
-        return False
+        return await self._writer.async_write(wire.cancel_vacation_sections())
     
     async def send_dynamic_change(self, field_to_update, value) -> bool:
 
-        jsonpayload = AtagJson().update_for(field_to_update, value)
-        if jsonpayload:
-            response = await self._async_send_request(UPDATE_PATH, jsonpayload)
-            if response:
-                return True
-
-        return False
+        return await self._writer.async_write(wire.field_sections(field_to_update, value))
     
     async def async_dhw_schedule_base_temp(self, value) -> bool:
         """Set the DHW temperature setpoint"""
@@ -146,13 +224,9 @@ class AtagOneApi(AtagOneEntity):
         if not dhw_schedule:
             raise ValueError("No DHW schedule data available; call async_update first")
         dhw_schedule["base_temp"] = value
-        jsonpayload = AtagJson().dhw_schedule_json(dhw_schedule)
-        if jsonpayload:
-            response = await self._async_send_request(UPDATE_PATH, jsonpayload) 
-            if response:
-                return True
-             
-        return False
+        return await self._writer.async_write(
+            wire.schedule_sections("dhw_schedule", dhw_schedule)
+        )
     
     async def async_ch_schedule_base_temp(self, value) -> bool:
         """Set the CH temperature setpoint"""
@@ -161,13 +235,9 @@ class AtagOneApi(AtagOneEntity):
         if not ch_schedule:
             raise ValueError("No CH schedule data available; call async_update first")
         ch_schedule["base_temp"] = value
-        jsonpayload = AtagJson().ch_schedule_json(ch_schedule)
-        if jsonpayload:
-            response = await self._async_send_request(UPDATE_PATH, jsonpayload) 
-            if response:
-                return True
-             
-        return False
+        return await self._writer.async_write(
+            wire.schedule_sections("ch_schedule", ch_schedule)
+        )
 
     async def async_fetch_data(self) -> dict:
         """Get state of all sensors and do some conversions"""
@@ -176,33 +246,319 @@ class AtagOneApi(AtagOneEntity):
         return self.sensors
 
     async def _ensure_session(self) -> aiohttp.ClientSession:
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(timeout=self._session_timeout)
+        if self._replay is not None:
+            return self._replay
+        if self._owns_session and (self._session is None or self._session.closed):
+            self._session = create_session()
         return self._session
 
-    async def async_update(self) -> bool:
-        """Report Data"""
+    async def async_update(self, info: Optional[int] = None, deadline: Optional[float] = None) -> bool:
+        """Report Data
+
+        Without info only the sections that are due according to the retrieve
+        scheduler are requested; the partial reply is merged into self.data.
+
+        deadline (event loop time, see deadline_in) bounds the whole update
+        including retries; AtagDeadlineExceeded is raised when it can't be met.
+        """
+
+        if info is None:
+            info = self._scheduler.next_info()
+
+        return await self._async_retrieve(info, PRIORITY_POLL, deadline)
+
+    def rebind(self, host: str, port: Optional[int] = None) -> None:
+        """Point the API at a new address of the same thermostat.
+
+        Requests that start from now on go to the new address. Failures seen
+        at the old address are forgotten (the breaker is reset) and pacing
+        moves to the admission controller of the new address.
+        """
+        if port is not None:
+            self.port = port
+        self.host = host
+        admission = self._admission
+        self._admission = admission_controller(host, self.port, admission.min_gap, admission.max_rate)
+        self.breaker.reset()
+
+    def export_seed(self) -> Optional[AtagSeed]:
+        """Return the state another API can start from, None before the first retrieve."""
+        if self.snapshot is None:
+            return None
+        return AtagSeed(
+            self.host,
+            self.port,
+            self.snapshot,
+            dict(self._fingerprints),
+            self._scheduler.fetch_times(),
+            self.heating,
+        )
+
+    def seed_from(self, seed: AtagSeed) -> None:
+        """Start from the snapshot another API retrieved (e.g. a config flow probe).
+
+        The sections that API fetched count as fetched by this one, so the
+        next poll only asks for what is due.
+        """
+        self._store_snapshot(seed.snapshot)
+        self._fingerprints = dict(seed.fingerprints)
+        self._scheduler.restore(seed.fetch_times)
+        self.heating = seed.heating
+
+    @staticmethod
+    def deadline_in(seconds: float) -> float:
+        """Return the deadline that lies the given number of seconds from now."""
+        return asyncio.get_running_loop().time() + seconds
+
+    async def _async_retrieve(self, info: int, priority: int, deadline: Optional[float] = None) -> bool:
+        """Retrieve the sections in info and merge them into the snapshot"""
 
-        json_payload = AtagJson().ReportJson()
-        resp = await self._async_send_request(READ_PATH, json_payload)
+        resp = await self._async_send_request(
+            READ_PATH, wire.retrieve_payload(info), priority=priority, deadline=deadline
+        )
         if not resp:
             return False
 
-        self.data = resp["retrieve_reply"]
+        self._merge_reply(resp["retrieve_reply"], info)
         
         boiler_status = self._coerce_int(self.reportdata.get("boiler_status")) or 0
         status = boiler_status & 14
         self.heating = status == 10
 
         return True
+
+    async def _async_confirm(self, info: int) -> bool:
+        """Fetch the sections touched by recent writes and tell the listeners"""
+
+        if not await self._async_retrieve(info, PRIORITY_CONFIRM):
+            return False
+
+        for listener in list(self._update_listeners):
+            listener()
+        return True
+
+    def add_update_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call listener whenever data was refreshed outside async_update (write confirmations).
+
+        Returns a function that removes the listener again.
+        """
+        self._update_listeners.append(listener)
+
+        def remove_listener() -> None:
+            if listener in self._update_listeners:
+                self._update_listeners.remove(listener)
+
+        return remove_listener
     
-    async def _async_send_request(self, request_path: str, json_payload: str, max_attempts: int = 3) -> Optional[Dict[str, Any]]:
-        """Send async web request with exponential backoff retry logic."""
-        async with self._request_lock:
-            return await self._async_send_request_impl(request_path, json_payload, max_attempts)
-    
-    async def _async_send_request_impl(self, request_path: str, json_payload: str, max_attempts: int = 3) -> Optional[Dict[str, Any]]:
-        """Send async web request with exponential backoff retry logic."""
+    async def async_wifiscan(self) -> Any:
+        """Request a wifi scan from the Atag One (on demand only)"""
+
+        if not await self.async_update(MESSAGE_INFO_WIFISCAN):
+            return None
+        return self.snapshot.get(MESSAGE_INFO_SECTIONS[MESSAGE_INFO_WIFISCAN])
+
+    def _merge_reply(self, reply: Dict[str, Any], info: int) -> None:
+        """Merge a (partial) retrieve reply into the cached snapshot.
+
+        Replies whose content fingerprint matches the cached one (ignoring
+        status.date_time and report.report_time) are dropped, so nothing is
+        decoded and no entity is woken up.
+        """
+        self._scheduler.mark_fetched(info)
+
+        fingerprints = self._reply_fingerprints(reply)
+        if self.snapshot is not None and all(
+            self._fingerprints.get(key) == fingerprint
+            for key, fingerprint in fingerprints.items()
+        ):
+            self.refreshes_skipped += 1
+            return
+
+        self._fingerprints.update(fingerprints)
+        self.refreshes_dispatched += 1
+        if self.snapshot is None or info == MESSAGE_INFO_ALL:
+            self._store_snapshot(AtagSnapshot(reply))
+        else:
+            self._store_snapshot(self.snapshot.merge(reply))
+
+    def _reply_fingerprints(self, reply: Dict[str, Any]) -> Dict[str, int]:
+        """Fingerprint every section of a reply; an unchanged report_time reuses the old one."""
+        fingerprints = {}
+        for key, value in reply.items():
+            if key in UNFINGERPRINTED:
+                continue
+            if key == "report" and key in self._fingerprints and isinstance(value, dict):
+                report_time = value.get("report_time")
+                if report_time is not None and report_time == self.reportdata.get("report_time"):
+                    fingerprints[key] = self._fingerprints[key]
+                    continue
+            fingerprints[key] = section_fingerprint(key, value)
+        return fingerprints
+
+    async def _async_send_update(self, sections: Dict[str, Dict[str, Any]]) -> bool:
+        """Send an update message and schedule a confirmation of the touched sections.
+
+        The touched sections are also invalidated, so the next poll refetches
+        them when the confirmation does not get through.
+        """
+        response = await self._async_send_request(UPDATE_PATH, wire.update_payload(sections))
+        if not response:
+            return False
+
+        self.last_write = time.monotonic()
+        info = 0
+        for section in sections:
+            info |= UPDATE_SECTION_INFO.get(section, 0)
+        self._scheduler.invalidate(info)
+        self._confirm.request(info)
+        return True
+
+    async def _async_send_request(
+        self,
+        request_path: str,
+        json_payload: bytes,
+        max_attempts: int = 3,
+        priority: int = PRIORITY_WRITE,
+        deadline: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Send async web request through the priority queue.
+
+        Identical polls that are already pending share one request. While the
+        circuit breaker is open requests fail fast with AtagCircuitOpenException.
+        """
+        if not self.breaker.closed:
+            await self._async_probe(priority, deadline)
+
+        if priority != PRIORITY_POLL:
+            return await self._async_send_queued(
+                request_path, json_payload, max_attempts, priority, deadline
+            )
+
+        key = (request_path, json_payload)
+        pending = self._pending_polls.get(key)
+        if pending is not None:
+            _LOGGER.debug("Collapsing poll to %s into the pending one", request_path)
+            return await asyncio.shield(pending)
+
+        future = self._pending_polls[key] = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            result = await self._async_send_queued(
+                request_path, json_payload, max_attempts, priority, deadline
+            )
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._pending_polls[key]
+
+    async def _async_probe(self, priority: int, deadline: Optional[float] = None) -> None:
+        """Send the half-open probe (a single status-only retrieve) when it is due.
+
+        Raises AtagCircuitOpenException when no probe is due, another probe is
+        in flight or the probe failed. A probe the thermostat answered with an
+        error status still proves it is reachable, so the request proceeds.
+        """
+        if not self.breaker.probe_due():
+            self.breaker.rejected += 1
+            raise AtagCircuitOpenException("ATAG One unreachable, circuit breaker is open")
+
+        self.breaker.start_probe()
+        _LOGGER.debug("Circuit breaker probing %s", self.host)
+        try:
+            await self._async_send_queued(
+                READ_PATH, wire.retrieve_payload(MESSAGE_INFO_STATUS), 1, priority, deadline
+            )
+        except asyncio.CancelledError:
+            if self.breaker.state == STATE_HALF_OPEN:
+                self.breaker.record_failure()
+            raise
+        except AtagDeadlineExceeded:
+            raise
+        except AtagConnectException as exc:
+            raise AtagCircuitOpenException("ATAG One still unreachable, circuit breaker is open") from exc
+        except AtagStatusException as exc:
+            _LOGGER.debug("Circuit breaker probe of %s answered with %s", self.host, exc)
+
+    async def _async_send_queued(
+        self,
+        request_path: str,
+        json_payload: bytes,
+        max_attempts: int,
+        priority: int,
+        deadline: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Send a request, recording the outcome in the circuit breaker."""
+        try:
+            result = await self._async_send_slotted(
+                request_path, json_payload, max_attempts, priority, deadline
+            )
+        except AtagDeadlineExceeded as exc:
+            if exc.attempted:
+                self.breaker.record_failure()
+            elif self.breaker.state == STATE_HALF_OPEN:
+                # the probe never went out, wait for the next one
+                self.breaker.record_failure()
+            raise
+        except AtagConnectException:
+            self.breaker.record_failure()
+            raise
+        except AtagStatusException:
+            # the thermostat answered, it just refused the message
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def _async_send_slotted(
+        self,
+        request_path: str,
+        json_payload: bytes,
+        max_attempts: int,
+        priority: int,
+        deadline: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Send a request once the queue grants the slot, queueing again when preempted."""
+        attempt = 0
+        while True:
+            try:
+                async with self._queue.slot(priority, deadline):
+                    return await self._async_send_request_impl(
+                        request_path, json_payload, max_attempts, attempt, deadline
+                    )
+            except RequestPreempted as exc:
+                attempt = exc.attempt + 1
+                _LOGGER.debug("Backoff for %s preempted by a higher priority request", request_path)
+            except SlotDeadlineExceeded as exc:
+                raise AtagDeadlineExceeded(
+                    f"Deadline passed while waiting to send to {request_path}", attempt > 0
+                ) from exc
+
+    @property
+    def queue_wait_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return queue wait time statistics per priority."""
+        return self._queue.wait_stats()
+
+    async def _async_send_request_impl(
+        self,
+        request_path: str,
+        json_payload: bytes,
+        max_attempts: int = 3,
+        first_attempt: int = 0,
+        deadline: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Send async web request with exponential backoff retry logic.
+
+        With a deadline every attempt timeout and backoff sleep is shrunk to
+        the remaining budget, and no attempt is started that would get less
+        than MIN_ATTEMPT_TIME.
+        """
         import random
         
         RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
@@ -214,13 +570,28 @@ class AtagOneApi(AtagOneEntity):
         MAX_RETRY_AFTER = 30
         
         session = await self._ensure_session()
-        url = BASE_URL.format(self.host, self.port, request_path)
         
-        for attempt in range(max_attempts):
+        for attempt in range(first_attempt, max_attempts):
+            # built per attempt, so retries follow a rebind()
+            url = BASE_URL.format(self.host, self.port, request_path)
             try:
+                await self._admit(deadline, attempt > 0)
+                attempt_timeout = self._attempt_timeout(request_path, deadline, attempt > 0)
                 _LOGGER.debug(f"Sending request attempt {attempt + 1}/{max_attempts} to {url}")
                 
-                async with session.post(url, data=json_payload.encode()) as response:
+                self.metrics.attempt(request_path, len(json_payload), attempt > 0)
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                async with session.post(url, data=json_payload, timeout=attempt_timeout) as response:
+                    body = await response.read()
+                    latency = loop.time() - started
+                    if self.recorder is not None:
+                        self.recorder.record(request_path, json_payload, response.status, body, latency)
+                    self._rtt_estimator(request_path).observe(latency)
+                    self.metrics.response(request_path, response.status, len(body), latency)
+                    if response.status >= HTTPStatus.BAD_REQUEST:
+                        self.metrics.failure(request_path)
+
                     # Handle non-retryable status codes
                     if response.status in NON_RETRYABLE_STATUS:
                         if response.status == HTTPStatus.NOT_FOUND:
@@ -245,7 +616,9 @@ class AtagOneApi(AtagOneEntity):
                                         pass
                             
                             _LOGGER.debug(f"Status {response.status}, retrying in {total_delay:.2f}s")
-                            await asyncio.sleep(total_delay)
+                            await self._queue.backoff(
+                                self._fit_backoff(total_delay, deadline), attempt
+                            )
                             continue
                         else:
                             raise AtagConnectException(f"Error {response.status} calling {url}")
@@ -261,33 +634,134 @@ class AtagOneApi(AtagOneEntity):
                         payload = await response.json(content_type=None)
                     
                     # Validate response
-                    if self.__check_response(request_path, payload):
+                    try:
+                        valid = self.__check_response(request_path, payload)
+                    except AtagStatusException:
+                        self.metrics.failure(request_path)
+                        raise
+                    if valid:
+                        self.metrics.success(request_path, time.monotonic())
                         return payload
                         
             except asyncio.CancelledError:
                 # Always re-raise CancelledError
                 raise
             except asyncio.TimeoutError as exc:
+                self.metrics.failure(request_path)
+                self._record_error(request_path, json_payload, started, ERROR_TIMEOUT)
+                estimator = self._rtt_estimator(request_path)
+                if attempt_timeout.total == estimator.timeout:
+                    # censored sample: the answer took at least this long
+                    estimator.observe(attempt_timeout.total)
+                if self._remaining(deadline) < MIN_ATTEMPT_TIME:
+                    raise AtagDeadlineExceeded(
+                        "Deadline passed while communicating with ATAG One", True
+                    ) from exc
                 if attempt < max_attempts - 1:
                     delay = min(BASE_DELAY * (BACKOFF_FACTOR ** attempt), MAX_DELAY)
                     jitter = random.uniform(0, JITTER_MAX)
                     total_delay = delay + jitter
                     _LOGGER.debug(f"Timeout on attempt {attempt + 1}/{max_attempts}, retrying in {total_delay:.2f}s")
-                    await asyncio.sleep(total_delay)
+                    await self._queue.backoff(self._fit_backoff(total_delay, deadline), attempt)
                 else:
                     raise AtagConnectException("Timeout while communicating with ATAG One") from exc
             except aiohttp.ClientError as exc:
+                self.metrics.failure(request_path)
+                self._record_error(request_path, json_payload, started, ERROR_CONNECTION)
                 if attempt < max_attempts - 1:
                     delay = min(BASE_DELAY * (BACKOFF_FACTOR ** attempt), MAX_DELAY)
                     jitter = random.uniform(0, JITTER_MAX)
                     total_delay = delay + jitter
                     _LOGGER.debug(f"Client error on attempt {attempt + 1}/{max_attempts}, retrying in {total_delay:.2f}s")
-                    await asyncio.sleep(total_delay)
+                    await self._queue.backoff(self._fit_backoff(total_delay, deadline), attempt)
                 else:
                     raise AtagConnectException("Unable to communicate with ATAG One") from exc
         
         return None
     
+    def _record_error(self, request_path: str, json_payload: bytes, started: float, error: str) -> None:
+        if self.recorder is not None:
+            latency = asyncio.get_running_loop().time() - started
+            self.recorder.record(request_path, json_payload, 0, None, latency, error)
+
+    async def async_stop_recording(self) -> None:
+        """Write the buffered exchanges and stop recording."""
+        if self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            await recorder.async_close()
+
+    def _remaining(self, deadline: Optional[float]) -> float:
+        """Return the seconds left until the deadline (infinite without one)."""
+        if deadline is None:
+            return float("inf")
+        return deadline - asyncio.get_running_loop().time()
+
+    async def _admit(self, deadline: Optional[float], attempted: bool) -> None:
+        """Wait for the device admission controller, within the remaining budget."""
+        max_wait = None
+        if deadline is not None:
+            max_wait = self._remaining(deadline) - MIN_ATTEMPT_TIME
+            if max_wait < 0:
+                raise AtagDeadlineExceeded("Not enough time left for another attempt", attempted)
+        try:
+            await self._admission.admit(max_wait)
+        except AdmissionRefused as exc:
+            raise AtagDeadlineExceeded(
+                f"Throttled for {exc.delay:.2f}s, past the deadline", attempted
+            ) from exc
+
+    @property
+    def transport_stats(self) -> Dict[str, Any]:
+        """Return request, status, byte and latency counters in total and per request path."""
+        return self.metrics.as_dict(time.monotonic())
+
+    @property
+    def queue_wait_time(self) -> Dict[int, Histogram]:
+        """Return the queue wait histogram per priority."""
+        return self._queue.wait_time
+
+    @property
+    def throttle_delay(self) -> Histogram:
+        """Return the admission control delay histogram of the device."""
+        return self._admission.delay
+
+    @property
+    def admission_stats(self) -> Dict[str, Any]:
+        """Return the admitted/throttled request counts and throttle delay of the device."""
+        return self._admission.as_dict()
+
+    def _rtt_estimator(self, request_path: str) -> RttEstimator:
+        estimator = self._rtt.get(request_path)
+        if estimator is None:
+            estimator = self._rtt[request_path] = RttEstimator(ceiling=self._session_timeout.total)
+        return estimator
+
+    def _attempt_timeout(
+        self, request_path: str, deadline: Optional[float], attempted: bool
+    ) -> aiohttp.ClientTimeout:
+        """Return the timeout of the next attempt.
+
+        It is derived from the observed round trip times of the path and
+        shrunk to the remaining budget.
+        """
+        remaining = self._remaining(deadline)
+        if remaining < MIN_ATTEMPT_TIME:
+            raise AtagDeadlineExceeded("Not enough time left for another attempt", attempted)
+        timeout = min(self._rtt_estimator(request_path).timeout, remaining)
+        return aiohttp.ClientTimeout(total=timeout, sock_connect=timeout)
+
+    @property
+    def rtt_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the round trip time estimate and derived timeout per request path."""
+        return {path: estimator.as_dict() for path, estimator in self._rtt.items()}
+
+    def _fit_backoff(self, delay: float, deadline: Optional[float]) -> float:
+        """Shrink a backoff sleep so an attempt still fits in the remaining budget."""
+        budget = self._remaining(deadline) - MIN_ATTEMPT_TIME
+        if budget <= 0:
+            raise AtagDeadlineExceeded("Not enough time left to retry", True)
+        return min(delay, budget)
+
     def __check_response(self, request_path, response: Dict[str, Any]) -> bool:
         if request_path == UPDATE_PATH:
             status = response["update_reply"]["acc_status"]
@@ -304,8 +778,7 @@ class AtagOneApi(AtagOneEntity):
     async def async_pair_atag(self) -> None:
         """Pair the Thermostat"""
 
-        json_payload = AtagJson().PairJson()
-        resp = await self._async_send_request(PAIR_PATH, json_payload)
+        resp = await self._async_send_request(PAIR_PATH, wire.PAIR_PAYLOAD)
         if resp is None:
             raise AtagConnectException("No response received when pairing with ATAG One")
 
@@ -324,20 +797,10 @@ class AtagOneApi(AtagOneEntity):
 
         self.paired = False
 
-    def _close(self) -> None:
-        if self._session and not self._session.closed:
+    async def async_close(self) -> None:
+        """Cancel pending confirmations, flush the recorder and close the session if it is our own."""
+        self._confirm.cancel()
+        await self.async_stop_recording()
+        if self._owns_session and self._session is not None and not self._session.closed:
             _LOGGER.debug("closing connection")
-            try:
-                loop = asyncio.get_running_loop()
-            except RuntimeError:
-                asyncio.run(self._session.close())
-                return
-
-            async def _close_session():
-                if self._session and not self._session.closed:
-                    await self._session.close()
-
-            if loop.is_running():
-                asyncio.run_coroutine_threadsafe(_close_session(), loop)
-            else:
-                loop.run_until_complete(_close_session())
+            await self._session.close()
@@ -0,0 +1,114 @@
+"""
+Circuit breaker for the ATAG One API wrapper
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+_LOGGER = logging.getLogger("atagoneapi")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+BREAKER_STATES = (STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN)
+
+""" Consecutive failed requests that open the breaker """
+DEFAULT_FAILURE_THRESHOLD = 3
+
+""" Seconds until the first probe, doubled after every failed probe up to the maximum """
+DEFAULT_PROBE_INTERVAL = 15.0
+DEFAULT_MAX_PROBE_INTERVAL = 600.0
+
+
+class CircuitBreaker:
+    """Stop talking to an unreachable thermostat until a probe gets through.
+
+    closed:     requests go out; failures are counted.
+    open:       requests fail fast until the next probe is due.
+    half_open:  a single probe is in flight; success closes the breaker,
+                failure opens it again with a doubled probe interval.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+        max_probe_interval: float = DEFAULT_MAX_PROBE_INTERVAL,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.probe_interval = probe_interval
+        self.next_probe: Optional[float] = None
+        self.transitions = 0
+        self.last_transition: Optional[float] = None
+        self.rejected = 0
+
+    @property
+    def closed(self) -> bool:
+        return self.state == STATE_CLOSED
+
+    def probe_due(self, now: Optional[float] = None) -> bool:
+        """Return True when the breaker is open and the next probe may be sent."""
+        now = time.monotonic() if now is None else now
+        return self.state == STATE_OPEN and now >= self.next_probe
+
+    def start_probe(self) -> None:
+        """Let a single probe through."""
+        self._transition(STATE_HALF_OPEN)
+
+    def record_success(self) -> None:
+        """A request got through: close the breaker."""
+        self.consecutive_failures = 0
+        self.probe_interval = self.base_probe_interval
+        self.next_probe = None
+        if self.state != STATE_CLOSED:
+            self._transition(STATE_CLOSED)
+
+    def record_failure(self, now: Optional[float] = None) -> None:
+        """A request failed: open the breaker once the threshold is reached."""
+        now = time.monotonic() if now is None else now
+        self.consecutive_failures += 1
+        if self.state == STATE_HALF_OPEN:
+            self.probe_interval = min(self.probe_interval * 2, self.max_probe_interval)
+        elif self.state == STATE_OPEN or self.consecutive_failures < self.failure_threshold:
+            return
+
+        self.next_probe = now + self.probe_interval
+        self._transition(STATE_OPEN)
+
+    def reset(self) -> None:
+        """Forget past failures, e.g. after the thermostat moved to another address."""
+        self.record_success()
+
+    def _transition(self, state: str) -> None:
+        _LOGGER.debug("Circuit breaker %s -> %s", self.state, state)
+        self.state = state
+        self.transitions += 1
+        self.last_transition = time.monotonic()
+
+    def as_dict(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Return the breaker state for diagnostics."""
+        now = time.monotonic() if now is None else now
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "transitions": self.transitions,
+            "rejected_requests": self.rejected,
+            "probe_interval": self.probe_interval,
+            "next_probe_in": (
+                max(round(self.next_probe - now, 1), 0.0)
+                if self.state == STATE_OPEN and self.next_probe is not None
+                else None
+            ),
+            "last_transition_age": (
+                round(now - self.last_transition, 1) if self.last_transition is not None else None
+            ),
+        }
@@ -0,0 +1,90 @@
+"""
+Post-write confirmation refresh for the ATAG One API wrapper
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+_LOGGER = logging.getLogger("atagoneapi")
+
+""" Seconds to wait after the last write before confirming """
+DEFAULT_CONFIRM_DELAY = 1.0
+
+""" Seconds after the first write by which the confirmation is sent at the latest """
+DEFAULT_CONFIRM_MAX_DELAY = 2.0
+
+
+class ConfirmationRefresh:
+    """Debounce the targeted retrieve that confirms a write.
+
+    Every successful write requests the info bits of the sections it
+    touched. The bits are OR-ed together and a single retrieve for all of
+    them is sent once no write arrived for `delay` seconds, but never later
+    than `max_delay` seconds after the first write of the batch.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[int], Awaitable[bool]],
+        delay: float = DEFAULT_CONFIRM_DELAY,
+        max_delay: float = DEFAULT_CONFIRM_MAX_DELAY,
+    ):
+        self._refresh = refresh
+        self.delay = delay
+        self.max_delay = max_delay
+        self._info = 0
+        self._deadline: Optional[float] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self.confirmations = 0
+
+    def request(self, info: int) -> None:
+        """Schedule (or postpone) the confirmation of the given sections."""
+        if not info:
+            return
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self._info |= info
+        if self._deadline is None:
+            self._deadline = now + self.max_delay
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = loop.call_at(min(now + self.delay, self._deadline), self._start_refresh)
+
+    def cancel(self) -> None:
+        """Drop the pending confirmation."""
+        if self._handle is not None:
+            self._handle.cancel()
+        if (
+            self._task is not None
+            and not self._task.done()
+            and not self._task.get_loop().is_closed()
+        ):
+            self._task.cancel()
+        self._handle = None
+        self._task = None
+        self._info = 0
+        self._deadline = None
+
+    def _start_refresh(self) -> None:
+        info, self._info = self._info, 0
+        self._handle = None
+        self._deadline = None
+        self._task = asyncio.get_running_loop().create_task(self._async_refresh(info))
+
+    async def _async_refresh(self, info: int) -> None:
+        _LOGGER.debug("Confirming write with retrieve info=%s", info)
+        try:
+            await self._refresh(info)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # the sections stay invalidated, so the next poll fetches them anyway
+            _LOGGER.debug("Write confirmation failed: %s", exc)
+        else:
+            self.confirmations += 1
@@ -0,0 +1,163 @@
+"""
+Discovery listener for ATAG One broadcasts
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from socket import AF_INET, SOCK_DGRAM, SO_REUSEADDR, SOL_SOCKET, socket
+from typing import Callable, Dict, List, Optional
+
+_LOGGER = logging.getLogger("atagoneapi")
+
+""" UDP port the thermostat broadcasts its announcements on """
+DISCOVERY_PORT = 11000
+
+""" Seconds an announcement stays in the cache after it was last heard """
+DEFAULT_ANNOUNCEMENT_TTL = 120.0
+
+""" Seconds a one-off discovery listens for every thermostat on the network """
+DEFAULT_DISCOVERY_WINDOW = 10.0
+
+ANNOUNCEMENT_PREFIX = "ONE"
+
+
+def parse_device_id(payload: bytes) -> Optional[str]:
+    """Return the device id of a broadcast like b"ONE 6808-1401-3109_15-30-001-544 ..."."""
+    parts = payload.decode("ascii", errors="ignore").split()
+    if len(parts) >= 2 and parts[0] == ANNOUNCEMENT_PREFIX:
+        return parts[1]
+    return None
+
+
+@dataclass
+class Announcement:
+    """A broadcast heard from a thermostat."""
+
+    host: str
+    payload: bytes
+    seen: float
+    device_id: Optional[str] = None
+
+
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, listener: "DiscoveryListener"):
+        self._listener = listener
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self._listener._received(data, addr[0])
+
+    def error_received(self, exc: Exception) -> None:
+        _LOGGER.debug("Discovery listener error: %s", exc)
+
+
+class DiscoveryListener:
+    """Listen for thermostat broadcasts in the background and cache them.
+
+    The socket is bound with SO_REUSEADDR, so other listeners on the
+    discovery port (a second Home Assistant integration, AtagOneApi.async_discover)
+    keep receiving the broadcasts as well.
+    """
+
+    def __init__(self, port: int = DISCOVERY_PORT, ttl: float = DEFAULT_ANNOUNCEMENT_TTL):
+        self.port = port
+        self.ttl = ttl
+        self._cache: Dict[str, Announcement] = {}
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._received_event: Optional[asyncio.Event] = None
+        self._start_lock = asyncio.Lock()
+        self._listeners: List[Callable[[Announcement], None]] = []
+
+    @property
+    def running(self) -> bool:
+        return self._transport is not None
+
+    async def async_start(self) -> bool:
+        """Bind the discovery port unless already listening; returns False when binding fails."""
+        async with self._start_lock:
+            if self._transport is not None:
+                return True
+
+            sock = socket(AF_INET, SOCK_DGRAM)
+            try:
+                sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+                sock.bind(("0.0.0.0", self.port))
+                sock.setblocking(False)
+                self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+                    lambda: _DiscoveryProtocol(self), sock=sock
+                )
+            except OSError as err:
+                sock.close()
+                _LOGGER.warning("Unable to listen for ATAG One broadcasts on port %s: %s", self.port, err)
+                return False
+            self._received_event = asyncio.Event()
+        _LOGGER.debug("Listening for ATAG One broadcasts on port %s", self.port)
+        return True
+
+    def stop(self) -> None:
+        """Close the socket; the cache is kept."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+            self._received_event = None
+
+    def _received(self, data: bytes, host: str) -> None:
+        device_id = parse_device_id(data)
+        announcement = self._cache[device_id or host] = Announcement(host, data, time.monotonic(), device_id)
+        if self._received_event is not None:
+            self._received_event.set()
+        for listener in list(self._listeners):
+            listener(announcement)
+
+    def add_listener(self, listener: Callable[[Announcement], None]) -> Callable[[], None]:
+        """Call listener with every announcement received; returns a function that removes it."""
+        self._listeners.append(listener)
+
+        def remove_listener() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return remove_listener
+
+    def announcements(self) -> List[Announcement]:
+        """Return the announcements heard within the TTL, one per device, most recent first."""
+        expired = time.monotonic() - self.ttl
+        for key in [key for key, item in self._cache.items() if item.seen < expired]:
+            del self._cache[key]
+        return sorted(self._cache.values(), key=lambda item: item.seen, reverse=True)
+
+    async def async_wait(self, timeout: float, settle: float = 0.0) -> List[Announcement]:
+        """Return the cached announcements.
+
+        When there are none, wait up to timeout seconds for the first one and
+        then listen settle seconds longer for other thermostats.
+        """
+        announcements = self.announcements()
+        if announcements or self._received_event is None:
+            return announcements
+
+        self._received_event.clear()
+        try:
+            await asyncio.wait_for(self._received_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            _LOGGER.debug("No ATAG One broadcast within %ss", timeout)
+            return []
+        if settle > 0:
+            await asyncio.sleep(settle)
+        return self.announcements()
+
+
+async def async_discover(window: float = DEFAULT_DISCOVERY_WINDOW, port: int = DISCOVERY_PORT) -> List[Announcement]:
+    """Listen window seconds and return every thermostat that announced itself."""
+    listener = DiscoveryListener(port)
+    if not await listener.async_start():
+        return []
+    try:
+        await asyncio.sleep(window)
+    finally:
+        listener.stop()
+    return listener.announcements()
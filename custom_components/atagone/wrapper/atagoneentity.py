@@ -1,28 +1,69 @@
 from datetime import datetime, timedelta
 import logging
-from typing import Any, Dict, Optional, Union
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Set, Union
 from urllib.parse import urlparse
 
+from .atagonesnapshot import AtagSnapshot, SnapshotRecord, EMPTY_RECORD, snapshot_changes
 
 _LOGGER = logging.getLogger(__name__)
 
 ATAG_EPOCH = datetime(2000, 1, 1)
 
+EMPTY_SENSORS: Mapping[str, Any] = MappingProxyType({})
+
 
 class AtagOneEntity(object):
     """Base entity for the Atag ONE API wrappers."""
 
+    _snapshot: Optional[AtagSnapshot] = None
+    _sensor_index: Mapping[str, Any] = EMPTY_SENSORS
+    _pending_changes: Optional[Set[str]] = None
+    sensors_version: int = 0
+
     def __init__(self):
         self.data: Optional[Dict[str, Any]] = None
         self.heating: bool = False
 
-    def _get_section(self, key: str) -> Dict[str, Any]:
-        """Return a section from the data payload, defaulting to an empty dict."""
-        if isinstance(self.data, dict):
-            section = self.data.get(key, {})
-            if isinstance(section, dict):
-                return section
-        return {}
+    @property
+    def snapshot(self) -> Optional[AtagSnapshot]:
+        """Return the decoded retrieve reply."""
+        return self._snapshot
+
+    @property
+    def data(self) -> Optional[Dict[str, Any]]:
+        """Return the cached retrieve reply as a (fresh) dict."""
+        if self._snapshot is None:
+            return None
+        return self._snapshot.as_dict()
+
+    @data.setter
+    def data(self, data: Optional[Dict[str, Any]]) -> None:
+        """Decode and store a new retrieve reply."""
+        self._store_snapshot(None if data is None else AtagSnapshot(data))
+
+    def _store_snapshot(self, snapshot: Optional[AtagSnapshot]) -> None:
+        """Store a new snapshot and rebuild the sensor index once."""
+        changes = snapshot_changes(self._snapshot, snapshot)
+        if changes is None:
+            self._pending_changes = None
+        elif self._pending_changes is not None:
+            self._pending_changes |= changes
+
+        self._snapshot = snapshot
+        self._sensor_index = MappingProxyType(self._build_sensor_index())
+        self.sensors_version += 1
+
+    def pop_changes(self) -> Optional[FrozenSet[str]]:
+        """Return the sections/keys changed since the last call, None for everything."""
+        changes, self._pending_changes = self._pending_changes, set()
+        return None if changes is None else frozenset(changes)
+
+    def _get_section(self, key: str) -> SnapshotRecord:
+        """Return a section record from the snapshot, defaulting to an empty record."""
+        if self._snapshot is None:
+            return EMPTY_RECORD
+        return self._snapshot.section(key)
 
     @property
     def id(self) -> Optional[str]:
@@ -31,34 +72,34 @@ class AtagOneEntity(object):
         return status.get("device_id")
 
     @property
-    def reportdata(self) -> Dict[str, Any]:
+    def reportdata(self) -> SnapshotRecord:
         """Return Report Json Data"""
         return self._get_section("report")
 
     @property
-    def controldata(self) -> Dict[str, Any]:
+    def controldata(self) -> SnapshotRecord:
         """Return Control Json Data"""
         return self._get_section("control")
 
     @property
-    def scheduledata(self) -> Dict[str, Any]:
+    def scheduledata(self) -> SnapshotRecord:
         """Return Schedules Json Data"""
         return self._get_section("schedules")
     
     @property
     def chscheduledata(self) -> Dict[str, Any]:
-        """Return CH schedules JSON data."""
+        """Return CH schedules JSON data (a mutable copy)."""
         schedule = self.scheduledata.get("ch_schedule")
-        return schedule if isinstance(schedule, dict) else {}
+        return schedule.as_dict() if isinstance(schedule, SnapshotRecord) else {}
     
     @property
     def dhwscheduledata(self) -> Dict[str, Any]:
-        """Return DHW schedules JSON data."""
+        """Return DHW schedules JSON data (a mutable copy)."""
         schedule = self.scheduledata.get("dhw_schedule")
-        return schedule if isinstance(schedule, dict) else {}
+        return schedule.as_dict() if isinstance(schedule, SnapshotRecord) else {}
     
     @property
-    def configurationdata(self) -> Dict[str, Any]:
+    def configurationdata(self) -> SnapshotRecord:
         """Return Configuration Json Data"""
         return self._get_section("configuration")
 
@@ -93,13 +134,17 @@ class AtagOneEntity(object):
         return urlparse(download_url).path.replace("/", "") or None
     
     @property
-    def sensors(self) -> Dict[str, Any]:
-        """Get all sensors from the report data"""
+    def sensors(self) -> Mapping[str, Any]:
+        """Get all sensors (read-only index, rebuilt when new data is stored)"""
+        return self._sensor_index
+
+    def _build_sensor_index(self) -> Dict[str, Any]:
+        """Flatten report, details, control and derived values into one dict."""
         sensors = {}
         report = self.reportdata
         details = report.get("details")
-        if not isinstance(details, dict):
-            details = {}
+        if not isinstance(details, SnapshotRecord):
+            details = EMPTY_RECORD
 
         for sensor, value in report.items():
             if sensor == "details":
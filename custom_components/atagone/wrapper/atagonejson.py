@@ -11,7 +11,26 @@ from dataclasses import dataclass, field
 from dataclasses_json import dataclass_json, config
 
 
-    
+MESSAGE_INFO_CONTROL = 1
+MESSAGE_INFO_SCHEDULES = 2
+MESSAGE_INFO_CONFIGURATION = 4
+MESSAGE_INFO_REPORT = 8
+MESSAGE_INFO_STATUS = 16
+MESSAGE_INFO_WIFISCAN = 32
+MESSAGE_INFO_EXTRA = 64
+MESSAGE_INFO_REPORT_DETAILS = 64
+MESSAGE_INFO_ALL = 127
+
+""" Reply section carried by each info bit (details are nested in the report) """
+MESSAGE_INFO_SECTIONS = {
+    MESSAGE_INFO_CONTROL: "control",
+    MESSAGE_INFO_SCHEDULES: "schedules",
+    MESSAGE_INFO_CONFIGURATION: "configuration",
+    MESSAGE_INFO_REPORT: "report",
+    MESSAGE_INFO_STATUS: "status",
+    MESSAGE_INFO_WIFISCAN: "wifiscan",
+}
+
 @dataclass_json
 @dataclass
 class AccountAuth:
@@ -202,7 +221,7 @@ class AtagRetrieveReply:
 class RetrieveMessage:
     seqnr: int = 0
     account_auth: AccountAuth = None
-    info: None = 127
+    info: int = MESSAGE_INFO_ALL
     
 @dataclass_json
 @dataclass
@@ -241,8 +260,8 @@ class AtagJson:
         self.retrieve = Report()
         self.pair = Pair()
         
-    def ReportJson(self) -> None:
-        self.retrieve.retrieve_message = RetrieveMessage()
+    def ReportJson(self, info: int = MESSAGE_INFO_ALL) -> None:
+        self.retrieve.retrieve_message = RetrieveMessage(info=info)
         self.retrieve.retrieve_message.account_auth = AccountAuth()
         return self.retrieve.to_json(sort_keys=False)
     
@@ -359,5 +378,5 @@ class AtagJson:
         self._UpdateJson()
         self.update.update_message.configuration = Configuration(frost_prot_enabled=enabled)
         return self.update.to_json(sort_keys=False)
-    
+
     
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+Lightweight metrics for the ATAG One API wrapper
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+""" Upper bounds (seconds) of the fixed latency buckets """
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+""" Rolling RTT estimator defaults """
+RTT_WINDOW = 64
+RTT_MIN_SAMPLES = 5
+RTT_PERCENTILE = 0.95
+RTT_SAFETY_FACTOR = 3.0
+RTT_TIMEOUT_FLOOR = 2.0
+RTT_TIMEOUT_CEILING = 15.0
+
+
+class Histogram:
+    """Histogram with fixed bucket bounds; observing a value is O(log buckets)."""
+
+    __slots__ = ("bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.max)
+                return self.max
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return count, mean, p50, p95, p99 and max."""
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max if self.count else None,
+        }
+
+
+class RttEstimator:
+    """Rolling window of round trip times that derives a request timeout.
+
+    The timeout is a high percentile of the recent samples times a safety
+    factor, clamped between a floor and a ceiling. Until enough samples are
+    in, the ceiling is used. A timed out request is recorded with the
+    timeout it had, so a device that became slower pushes the timeout up
+    instead of timing out forever.
+    """
+
+    __slots__ = ("samples", "percentile", "factor", "floor", "ceiling", "min_samples", "_timeout")
+
+    def __init__(
+        self,
+        window: int = RTT_WINDOW,
+        percentile: float = RTT_PERCENTILE,
+        factor: float = RTT_SAFETY_FACTOR,
+        floor: float = RTT_TIMEOUT_FLOOR,
+        ceiling: float = RTT_TIMEOUT_CEILING,
+        min_samples: int = RTT_MIN_SAMPLES,
+    ):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.percentile = percentile
+        self.factor = factor
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self._timeout: Optional[float] = None
+
+    def observe(self, rtt: float) -> None:
+        """Record one round trip time (seconds)."""
+        self.samples.append(rtt)
+        self._timeout = None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the q-quantile (nearest rank) of the samples in the window."""
+        if not self.samples:
+            return None
+        ordered: List[float] = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    @property
+    def timeout(self) -> float:
+        """Return the request timeout derived from the recent samples."""
+        if self._timeout is None:
+            if len(self.samples) < self.min_samples:
+                self._timeout = self.ceiling
+            else:
+                estimate = self.quantile(self.percentile) * self.factor
+                self._timeout = min(max(estimate, self.floor), self.ceiling)
+        return self._timeout
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return samples, p50, p95 and the derived timeout."""
+        return {
+            "samples": len(self.samples),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "timeout": self.timeout,
+        }
+
+
+""" Number of recent attempts the error rate is computed over """
+ERROR_RATE_WINDOW = 100
+
+
+class PathMetrics:
+    """Request counters, status codes, bytes and latency of one request path."""
+
+    __slots__ = (
+        "requests", "successes", "failures", "retries", "statuses",
+        "bytes_sent", "bytes_received", "latency", "last_success", "_recent",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.statuses: Dict[int, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram()
+        self.last_success: Optional[float] = None
+        self._recent: Deque[bool] = deque(maxlen=ERROR_RATE_WINDOW)
+
+    def attempt(self, sent: int, retry: bool) -> None:
+        self.requests += 1
+        self.bytes_sent += sent
+        if retry:
+            self.retries += 1
+
+    def response(self, status: int, received: int, latency: float) -> None:
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes_received += received
+        self.latency.observe(latency)
+
+    def success(self, now: float) -> None:
+        self.successes += 1
+        self.last_success = now
+        self._recent.append(True)
+
+    def failure(self) -> None:
+        self.failures += 1
+        self._recent.append(False)
+
+    @property
+    def error_rate(self) -> Optional[float]:
+        """Return the share of failed attempts among the recent ones."""
+        if not self._recent:
+            return None
+        return self._recent.count(False) / len(self._recent)
+
+    def as_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "statuses": dict(self.statuses),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "latency": self.latency.as_dict(),
+            "error_rate": self.error_rate,
+            "last_success_age": None if self.last_success is None else now - self.last_success,
+        }
+
+
+class TransportMetrics:
+    """PathMetrics per request path plus their total."""
+
+    def __init__(self):
+        self.total = PathMetrics()
+        self.paths: Dict[str, PathMetrics] = {}
+
+    def _both(self, path: str) -> Tuple[PathMetrics, PathMetrics]:
+        metrics = self.paths.get(path)
+        if metrics is None:
+            metrics = self.paths[path] = PathMetrics()
+        return metrics, self.total
+
+    def attempt(self, path: str, sent: int, retry: bool) -> None:
+        """Record an attempt that is about to be sent."""
+        for metrics in self._both(path):
+            metrics.attempt(sent, retry)
+
+    def response(self, path: str, status: int, received: int, latency: float) -> None:
+        """Record a received response (any status)."""
+        for metrics in self._both(path):
+            metrics.response(status, received, latency)
+
+    def success(self, path: str, now: float) -> None:
+        """Record an attempt that returned a valid reply."""
+        for metrics in self._both(path):
+            metrics.success(now)
+
+    def failure(self, path: str) -> None:
+        """Record a failed attempt (error status, timeout or connection error)."""
+        for metrics in self._both(path):
+            metrics.failure()
+
+    def as_dict(self, now: float) -> Dict[str, Any]:
+        """Return the total and the per path metrics."""
+        return {
+            "total": self.total.as_dict(now),
+            "paths": {path: metrics.as_dict(now) for path, metrics in self.paths.items()},
+        }
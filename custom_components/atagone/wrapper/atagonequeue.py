@@ -0,0 +1,126 @@
+"""
+Priority request queue for the ATAG One API wrapper
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .atagonemetrics import Histogram
+
+""" Lower value is served first """
+PRIORITY_WRITE = 0
+PRIORITY_CONFIRM = 1
+PRIORITY_POLL = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_WRITE: "write",
+    PRIORITY_CONFIRM: "confirm",
+    PRIORITY_POLL: "poll",
+}
+
+
+class RequestPreempted(Exception):
+    """A higher priority request arrived while this one was backing off."""
+
+    def __init__(self, attempt: int):
+        super().__init__(attempt)
+        self.attempt = attempt
+
+
+class SlotDeadlineExceeded(Exception):
+    """The deadline passed before the request got the slot."""
+
+
+class RequestQueue:
+    """Serialize requests to the device, serving the highest priority first.
+
+    Only one request holds the slot at a time. A request that is backing off
+    between retries can be preempted: backoff() raises RequestPreempted as
+    soon as a higher priority request is waiting, so the holder can give up
+    the slot and queue again behind it.
+    """
+
+    def __init__(self):
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._busy = False
+        self._active_priority: Optional[int] = None
+        self._preempt: Optional[asyncio.Event] = None
+        self.wait_time: Dict[int, Histogram] = {
+            priority: Histogram() for priority in PRIORITY_NAMES
+        }
+
+    @asynccontextmanager
+    async def slot(self, priority: int, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """Wait for the request slot at the given priority.
+
+        Raises SlotDeadlineExceeded when the slot is not granted before the
+        deadline (loop time).
+        """
+        loop = asyncio.get_running_loop()
+        enqueued = loop.time()
+
+        if self._busy or self._waiters:
+            future = loop.create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+            if self._preempt is not None and priority < self._active_priority:
+                self._preempt.set()
+            try:
+                if deadline is None:
+                    await future
+                else:
+                    await asyncio.wait_for(future, max(deadline - enqueued, 0))
+            except (asyncio.CancelledError, asyncio.TimeoutError) as exc:
+                if future.done() and not future.cancelled():
+                    self._release()
+                if isinstance(exc, asyncio.TimeoutError):
+                    raise SlotDeadlineExceeded() from exc
+                raise
+        else:
+            self._busy = True
+
+        self._active_priority = priority
+        self._preempt = asyncio.Event()
+        self.wait_time.setdefault(priority, Histogram()).observe(loop.time() - enqueued)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def backoff(self, delay: float, attempt: int) -> None:
+        """Sleep between retries, raising RequestPreempted when a higher priority request waits."""
+        if self._preempted():
+            raise RequestPreempted(attempt)
+
+        preempt = self._preempt
+        try:
+            await asyncio.wait_for(preempt.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            return
+        raise RequestPreempted(attempt)
+
+    def _preempted(self) -> bool:
+        return bool(self._waiters) and self._waiters[0][0] < self._active_priority
+
+    def _release(self) -> None:
+        self._active_priority = None
+        self._preempt = None
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._busy = False
+
+    def wait_stats(self) -> Dict[str, Dict]:
+        """Return the queue wait histogram summary per priority."""
+        return {
+            PRIORITY_NAMES.get(priority, str(priority)): histogram.as_dict()
+            for priority, histogram in self.wait_time.items()
+        }
@@ -0,0 +1,230 @@
+"""
+Record and replay of ATAG One request/response traces
+
+A trace is an append-only JSON Lines file (gzip compressed when the name ends
+in .gz) with one exchange per line:
+
+    {"t": 1700000000.123, "p": "/retrieve", "q": "<request>", "s": 200, "l": 0.041, "r": "<reply>"}
+
+t is the wall clock time the request was sent, l the latency. Exchanges
+that got no response are recorded with status 0 and the error in "e".
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, IO, List, Optional
+
+import aiohttp
+
+_LOGGER = logging.getLogger("atagoneapi")
+
+""" Buffered exchanges that trigger a write, and the max seconds they stay buffered """
+FLUSH_RECORDS = 32
+FLUSH_INTERVAL = 10.0
+
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+
+
+def _open_trace(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class TraceRecorder:
+    """Append request/response exchanges to a trace file.
+
+    Exchanges are buffered and written by an executor job, so recording
+    never blocks the event loop on file I/O. Each batch waits for the write
+    of the previous one, so the trace stays in order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._buffer: List[str] = []
+        self._flushed = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.recorded = 0
+
+    def record(
+        self,
+        path: str,
+        request: bytes,
+        status: int,
+        reply: Optional[bytes],
+        latency: float,
+        error: Optional[str] = None,
+    ) -> None:
+        """Buffer one exchange; the buffer is written once it is large or old enough."""
+        exchange: Dict[str, Any] = {
+            "t": round(time.time() - latency, 3),
+            "p": path,
+            "q": request.decode(),
+            "s": status,
+            "l": round(latency, 4),
+        }
+        if reply is not None:
+            exchange["r"] = reply.decode(errors="replace")
+        if error is not None:
+            exchange["e"] = error
+        self._buffer.append(json.dumps(exchange, separators=(",", ":")))
+        self.recorded += 1
+
+        if len(self._buffer) >= FLUSH_RECORDS or time.monotonic() - self._flushed >= FLUSH_INTERVAL:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        lines, self._buffer = self._buffer, []
+        self._flushed = time.monotonic()
+        self._flush_task = asyncio.get_running_loop().create_task(
+            self._async_flush(lines, self._flush_task)
+        )
+
+    async def _async_flush(self, lines: List[str], previous: Optional[asyncio.Task]) -> None:
+        """Write a batch once the previous batch is written."""
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, lines)
+        except Exception as err:
+            _LOGGER.error("Writing %s exchanges to %s failed: %s", len(lines), self.path, err)
+
+    def _write(self, lines: List[str]) -> None:
+        with self._lock, _open_trace(self.path, "a") as fp:
+            fp.write("\n".join(lines) + "\n")
+
+    async def async_close(self) -> None:
+        """Write what is still buffered and wait for the pending writes."""
+        if self._buffer:
+            self._schedule_flush()
+        if self._flush_task is not None:
+            await asyncio.wait([self._flush_task])
+            self._flush_task = None
+
+    def close(self) -> None:
+        """Write what is still buffered (blocking, for shutdown outside the loop)."""
+        if self._buffer:
+            lines, self._buffer = self._buffer, []
+            self._write(lines)
+
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    """Read all exchanges of a trace file (blocking)."""
+    with _open_trace(path, "r") as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+class ReplayExhausted(aiohttp.ClientConnectionError):
+    """The trace has no more exchanges for the requested path."""
+
+
+class _ReplayResponse:
+    """The parts of aiohttp.ClientResponse AtagOneApi uses."""
+
+    def __init__(self, status: int, body: bytes):
+        self.status = status
+        self.headers: Dict[str, str] = {}
+        self._body = body
+        self.content_length = len(body)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def json(self, content_type: Optional[str] = "application/json") -> Any:
+        return json.loads(self._body)
+
+
+class _ReplayRequest:
+    def __init__(self, session: "ReplaySession", path: str):
+        self._session = session
+        self._path = path
+
+    async def __aenter__(self) -> _ReplayResponse:
+        return await self._session._async_reply(self._path)
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+class ReplaySession:
+    """Stand-in for the aiohttp session that answers from a recorded trace.
+
+    Requests are answered with the recorded exchanges of the same path, in
+    order. With speed 1 replies arrive at the recorded pace (relative to the
+    first exchange), speed 60 replays an hour per minute and speed 0 replies
+    immediately. Recorded failures are raised again as timeouts or
+    connection errors. With loop=True the trace starts over when exhausted.
+    """
+
+    def __init__(self, exchanges: List[Dict[str, Any]], speed: float = 1.0, loop: bool = False):
+        self.speed = speed
+        self.loop = loop
+        self.closed = False
+        self.replayed = 0
+        self._exchanges: Dict[str, List[Dict[str, Any]]] = {}
+        for exchange in exchanges:
+            self._exchanges.setdefault(exchange["p"], []).append(exchange)
+        self._position: Dict[str, int] = {}
+        self._origin = min((exchange["t"] for exchange in exchanges), default=0.0)
+        self._started: Optional[float] = None
+        self._laps = 0
+        self._duration = (
+            max(exchange["t"] + exchange.get("l", 0) for exchange in exchanges) - self._origin
+            if exchanges
+            else 0.0
+        )
+
+    @classmethod
+    def from_file(cls, path: str, speed: float = 1.0, loop: bool = False) -> "ReplaySession":
+        """Load a trace file (blocking; run it in an executor inside Home Assistant)."""
+        return cls(load_trace(path), speed, loop)
+
+    def post(self, url: str, data: Any = None, timeout: Any = None) -> _ReplayRequest:
+        return _ReplayRequest(self, url[url.find("/", url.find("//") + 2):])
+
+    async def close(self) -> None:
+        self.closed = True
+
+    def _next(self, path: str) -> Dict[str, Any]:
+        exchanges = self._exchanges.get(path)
+        if not exchanges:
+            raise ReplayExhausted(f"No recorded exchanges for {path}")
+
+        position = self._position.get(path, 0)
+        if position >= len(exchanges):
+            if not self.loop:
+                raise ReplayExhausted(f"Recorded exchanges for {path} exhausted")
+            self._position = {}
+            self._laps += 1
+            position = 0
+        self._position[path] = position + 1
+        return exchanges[position]
+
+    async def _async_reply(self, path: str) -> _ReplayResponse:
+        exchange = self._next(path)
+        loop = asyncio.get_running_loop()
+        if self._started is None:
+            self._started = loop.time()
+
+        if self.speed > 0:
+            offset = self._laps * self._duration + exchange["t"] + exchange.get("l", 0) - self._origin
+            delay = self._started + offset / self.speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        self.replayed += 1
+        error = exchange.get("e")
+        if error == ERROR_TIMEOUT:
+            raise asyncio.TimeoutError()
+        if error is not None or not exchange["s"]:
+            raise aiohttp.ClientConnectionError(f"Recorded {error or 'connection'} error")
+        return _ReplayResponse(exchange["s"], exchange.get("r", "").encode())
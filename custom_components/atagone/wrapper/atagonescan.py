@@ -0,0 +1,131 @@
+"""
+Subnet scan for ATAG One thermostats
+
+Fallback for networks where the discovery broadcasts do not arrive (other
+VLAN, broadcast filtering): every address of a network range is probed on
+the thermostat port and each responder is verified with a status-only
+retrieve that also returns its device id.
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import asyncio
+import ipaddress
+import json
+import logging
+import time
+from typing import List, Optional
+
+import aiohttp
+
+from .atagonediscovery import Announcement
+from .atagonejson import MESSAGE_INFO_STATUS
+from . import atagonewire as wire
+
+_LOGGER = logging.getLogger("atagoneapi")
+
+""" Hosts probed at the same time """
+SCAN_CONCURRENCY = 64
+
+""" Seconds a host gets to accept the connection, and to answer the retrieve """
+SCAN_CONNECT_TIMEOUT = 0.5
+SCAN_VERIFY_TIMEOUT = 3.0
+
+""" Largest range that is scanned (a /22) """
+SCAN_MAX_HOSTS = 1024
+
+
+class ScanRangeTooLarge(ValueError):
+    """The network range has more than SCAN_MAX_HOSTS addresses."""
+
+
+def scan_hosts(network: str) -> List[str]:
+    """Return the host addresses of a CIDR range like 192.168.1.0/24.
+
+    Raises ValueError for an invalid range and ScanRangeTooLarge when it is
+    too large to scan.
+    """
+    parsed = ipaddress.ip_network(network.strip(), strict=False)
+    if parsed.num_addresses > SCAN_MAX_HOSTS:
+        raise ScanRangeTooLarge(f"{network} has more than {SCAN_MAX_HOSTS} addresses")
+    if parsed.num_addresses == 1:
+        return [str(parsed.network_address)]
+    return [str(host) for host in parsed.hosts()]
+
+
+async def _async_port_open(host: str, port: int, timeout: float) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def _async_verify(
+    session: aiohttp.ClientSession, host: str, port: int, timeout: float
+) -> Optional[Announcement]:
+    """Retrieve the status section and return the device id the host reports."""
+    url = f"http://{host}:{port}/retrieve"
+    try:
+        async with session.post(
+            url,
+            data=wire.retrieve_payload(MESSAGE_INFO_STATUS),
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            if response.status != 200:
+                return None
+            body = await response.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+
+    try:
+        reply = json.loads(body)["retrieve_reply"]
+        device_id = reply["status"]["device_id"]
+    except (ValueError, KeyError, TypeError):
+        _LOGGER.debug("%s answered on port %s, but not like an ATAG One", host, port)
+        return None
+    return Announcement(host, body, time.monotonic(), device_id)
+
+
+async def async_scan(
+    network: str,
+    port: int = 10000,
+    session: Optional[aiohttp.ClientSession] = None,
+    concurrency: int = SCAN_CONCURRENCY,
+    connect_timeout: float = SCAN_CONNECT_TIMEOUT,
+    verify_timeout: float = SCAN_VERIFY_TIMEOUT,
+) -> List[Announcement]:
+    """Probe every host of network on port and return the verified thermostats.
+
+    A /24 takes about four connect timeouts when nothing answers.
+    """
+    hosts = scan_hosts(network)
+    semaphore = asyncio.Semaphore(concurrency)
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession()
+
+    async def probe(host: str) -> Optional[Announcement]:
+        async with semaphore:
+            if not await _async_port_open(host, port, connect_timeout):
+                return None
+            return await _async_verify(session, host, port, verify_timeout)
+
+    started = time.monotonic()
+    try:
+        results = await asyncio.gather(*(probe(host) for host in hosts))
+    finally:
+        if own_session:
+            await session.close()
+
+    found = {item.device_id: item for item in results if item is not None}
+    _LOGGER.debug(
+        "Scanned %s hosts of %s in %.1fs, found %s", len(hosts), network, time.monotonic() - started, len(found)
+    )
+    return list(found.values())
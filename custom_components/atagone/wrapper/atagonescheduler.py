@@ -0,0 +1,73 @@
+"""
+Retrieve scheduler for the ATAG One API wrapper
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import time
+from typing import Dict, Optional
+
+from .atagonejson import (
+    MESSAGE_INFO_CONTROL,
+    MESSAGE_INFO_SCHEDULES,
+    MESSAGE_INFO_CONFIGURATION,
+    MESSAGE_INFO_REPORT,
+    MESSAGE_INFO_STATUS,
+    MESSAGE_INFO_REPORT_DETAILS,
+)
+
+""" Sections that change every few seconds and are fetched on every poll """
+FAST_SECTIONS = MESSAGE_INFO_CONTROL | MESSAGE_INFO_REPORT | MESSAGE_INFO_REPORT_DETAILS
+
+""" Sections that rarely change and are only refreshed every slow_interval """
+SLOW_SECTIONS = (MESSAGE_INFO_SCHEDULES, MESSAGE_INFO_CONFIGURATION, MESSAGE_INFO_STATUS)
+
+DEFAULT_SLOW_INTERVAL = 600
+
+
+class RetrieveScheduler:
+    """Decide which retrieve sections are due on the next poll.
+
+    Report and control are requested on every poll, configuration, schedules
+    and status only when their slow interval has elapsed or when they were
+    invalidated (e.g. after a write). Wifiscan is never scheduled and must be
+    requested explicitly.
+    """
+
+    def __init__(self, slow_interval: float = DEFAULT_SLOW_INTERVAL):
+        self.slow_interval = slow_interval
+        self._last_fetch: Dict[int, float] = {}
+        self._forced = 0
+
+    def next_info(self, now: Optional[float] = None) -> int:
+        """Return the info bitmask for the next poll."""
+        now = time.monotonic() if now is None else now
+        info = FAST_SECTIONS | self._forced
+        for section in SLOW_SECTIONS:
+            last = self._last_fetch.get(section)
+            if last is None or now - last >= self.slow_interval:
+                info |= section
+        return info
+
+    def mark_fetched(self, info: int, now: Optional[float] = None) -> None:
+        """Record that the sections in info were received."""
+        now = time.monotonic() if now is None else now
+        bit = 1
+        while bit <= info:
+            if info & bit:
+                self._last_fetch[bit] = now
+            bit <<= 1
+        self._forced &= ~info
+
+    def invalidate(self, info: int) -> None:
+        """Force the sections in info to be fetched on the next poll."""
+        self._forced |= info
+
+    def fetch_times(self) -> Dict[int, float]:
+        """Return when each section was last received."""
+        return dict(self._last_fetch)
+
+    def restore(self, fetch_times: Dict[int, float]) -> None:
+        """Take over the fetch times of another scheduler (a seeded snapshot)."""
+        self._last_fetch = dict(fetch_times)
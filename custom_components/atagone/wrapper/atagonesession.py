@@ -0,0 +1,77 @@
+"""
+Shared aiohttp session for the ATAG One API wrapper
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import logging
+from typing import Hashable, Optional, Set
+
+import aiohttp
+
+_LOGGER = logging.getLogger("atagoneapi")
+
+""" Connections kept in total and per thermostat (one request is in flight per device) """
+CONNECTION_LIMIT = 16
+CONNECTION_LIMIT_PER_HOST = 2
+
+""" Seconds an idle connection is kept open for reuse by the next poll """
+KEEPALIVE_TIMEOUT = 20
+
+""" Seconds a request may take at most, attempt timeouts are derived per request """
+SESSION_TIMEOUT = 15
+
+
+def create_session() -> aiohttp.ClientSession:
+    """Create a session with the connector settings used for ATAG One devices."""
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=300,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=SESSION_TIMEOUT),
+    )
+
+
+class SessionRegistry:
+    """Hand out one shared session to every holder and close it after the last release.
+
+    Holders are identified by a key (the config entry id), so acquiring or
+    releasing twice for the same key does not change the count.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._holders: Set[Hashable] = set()
+        self.created = 0
+
+    @property
+    def holders(self) -> int:
+        return len(self._holders)
+
+    def acquire(self, holder: Hashable) -> aiohttp.ClientSession:
+        """Return the shared session, creating it for the first holder."""
+        if self._session is None or self._session.closed:
+            self._session = create_session()
+            self.created += 1
+            _LOGGER.debug("Created shared session")
+        self._holders.add(holder)
+        return self._session
+
+    async def async_release(self, holder: Hashable) -> None:
+        """Drop a holder; the session is closed when none are left."""
+        self._holders.discard(holder)
+        if not self._holders:
+            await self.async_close()
+
+    async def async_close(self) -> None:
+        """Close the session regardless of holders."""
+        self._holders.clear()
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            _LOGGER.debug("Closing shared session")
+            await session.close()
@@ -0,0 +1,268 @@
+"""
+Read-only snapshot records for ATAG One retrieve replies
+
+A retrieve reply is decoded once into compact slotted records whose fields
+follow the dataclasses in atagonejson. Keys the dataclasses don't know about
+are kept in a side map, so nothing the thermostat sends is lost.
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+from dataclasses import fields
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterator, Mapping, Optional, Set, Tuple, get_args
+
+from .atagonejson import (
+    Configuration,
+    Control,
+    Details,
+    RetrieveReply,
+    Schedule,
+    Status,
+)
+
+EMPTY_EXTRA: Mapping[str, Any] = MappingProxyType({})
+
+""" Sections entities can depend on ("details" is the report.details record) """
+SNAPSHOT_SECTIONS = ("status", "report", "details", "control", "schedules", "configuration")
+
+""" Fields that change on every reply without carrying a new reading """
+VOLATILE_FIELDS = {
+    "status": frozenset({"date_time"}),
+    "report": frozenset({"report_time"}),
+}
+
+""" Reply keys that are not part of the content fingerprint """
+UNFINGERPRINTED = frozenset({"seqnr", "acc_status"})
+
+_MISSING = object()
+
+
+class SnapshotRecord:
+    """Read-only record with mapping style access to the fields present in the payload."""
+
+    __slots__ = ("_present", "_extra")
+
+    _fields: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+    _nested: Dict[str, type] = {}
+
+    def __init__(self, payload: Optional[Mapping[str, Any]] = None):
+        setter = object.__setattr__
+        payload = payload or {}
+        present = 0
+        for index, name in enumerate(self._fields):
+            value = payload.get(name)
+            if name in payload:
+                present |= 1 << index
+                nested = self._nested.get(name)
+                if nested is not None and isinstance(value, dict):
+                    value = nested(value)
+            setter(self, name, value)
+        setter(self, "_present", present)
+
+        extra = EMPTY_EXTRA
+        if len(payload) != present.bit_count():
+            extra = MappingProxyType({k: v for k, v in payload.items() if k not in self._index})
+        setter(self, "_extra", extra)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    @property
+    def extra(self) -> Mapping[str, Any]:
+        """Return the keys that are not part of the record fields."""
+        return self._extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a value like dict.get, default when the key was not in the payload."""
+        index = self._index.get(key)
+        if index is None:
+            return self._extra.get(key, default)
+        if self._present >> index & 1:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        index = self._index.get(key)
+        if index is None:
+            return self._extra[key]
+        if self._present >> index & 1:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        index = self._index.get(key)
+        if index is None:
+            return key in self._extra
+        return bool(self._present >> index & 1)
+
+    def __iter__(self) -> Iterator[str]:
+        for key, _ in self.items():
+            yield key
+
+    def __len__(self) -> int:
+        return self._present.bit_count() + len(self._extra)
+
+    def __bool__(self) -> bool:
+        return bool(self._present) or bool(self._extra)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate over the present fields in wire order, then the extra keys."""
+        present = self._present
+        for index, name in enumerate(self._fields):
+            if present >> index & 1:
+                yield name, getattr(self, name)
+        yield from self._extra.items()
+
+    def keys(self) -> Iterator[str]:
+        return iter(self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a fresh (mutable) dict in the original reply layout."""
+        return {
+            key: value.as_dict() if isinstance(value, SnapshotRecord) else value
+            for key, value in self.items()
+        }
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return (
+            self._present == other._present
+            and self._values() == other._values()
+            and self._extra == other._extra
+        )
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def __reduce__(self):
+        return (type(self), (self.as_dict(),))
+
+
+def _record_type(name: str, source: type, nested: Optional[Dict[str, type]] = None) -> type:
+    """Create a slotted record type with the fields (and types) of a json dataclass."""
+    source_fields = fields(source)
+    names = tuple(f.name for f in source_fields)
+    return type(
+        name,
+        (SnapshotRecord,),
+        {
+            "__slots__": names,
+            "__annotations__": {f.name: f.type for f in source_fields},
+            "__doc__": f"Read-only {source.__name__} section.",
+            "_fields": names,
+            "_index": {field_name: index for index, field_name in enumerate(names)},
+            "_nested": nested or {},
+        },
+    )
+
+
+def _section_type(name: str) -> type:
+    """Return the dataclass of a RetrieveReply section (unwrapping Optional)."""
+    field_type = {f.name: f.type for f in fields(RetrieveReply)}[name]
+    return get_args(field_type)[0]
+
+
+StatusRecord = _record_type("StatusRecord", Status)
+DetailsRecord = _record_type("DetailsRecord", Details)
+ReportRecord = _record_type("ReportRecord", _section_type("report"), {"details": DetailsRecord})
+ControlRecord = _record_type("ControlRecord", Control)
+ConfigurationRecord = _record_type("ConfigurationRecord", Configuration)
+ScheduleRecord = _record_type("ScheduleRecord", Schedule)
+SchedulesRecord = _record_type(
+    "SchedulesRecord",
+    _section_type("schedules"),
+    {"ch_schedule": ScheduleRecord, "dhw_schedule": ScheduleRecord},
+)
+
+_SnapshotBase = _record_type(
+    "_SnapshotBase",
+    RetrieveReply,
+    {
+        "status": StatusRecord,
+        "report": ReportRecord,
+        "control": ControlRecord,
+        "schedules": SchedulesRecord,
+        "configuration": ConfigurationRecord,
+    },
+)
+
+EMPTY_RECORD = SnapshotRecord()
+
+
+class AtagSnapshot(_SnapshotBase):
+    """Decoded retrieve reply: one read-only record per section."""
+
+    __slots__ = ()
+
+    def section(self, key: str) -> SnapshotRecord:
+        """Return a section record, an empty record when it was never received."""
+        section = self.get(key)
+        if isinstance(section, SnapshotRecord):
+            return section
+        return EMPTY_RECORD
+
+    def merge(self, reply: Mapping[str, Any]) -> "AtagSnapshot":
+        """Return a new snapshot with the sections present in a partial reply replaced."""
+        merged = dict(self.items())
+        merged.update(AtagSnapshot(reply).items())
+        snapshot = object.__new__(AtagSnapshot)
+        setter = object.__setattr__
+        present = 0
+        for index, name in enumerate(self._fields):
+            if name in merged:
+                present |= 1 << index
+            setter(snapshot, name, merged.get(name))
+        setter(snapshot, "_present", present)
+        extra = {k: v for k, v in merged.items() if k not in self._index}
+        setter(snapshot, "_extra", MappingProxyType(extra) if extra else EMPTY_EXTRA)
+        return snapshot
+
+
+def _section_record(snapshot: AtagSnapshot, section: str) -> SnapshotRecord:
+    if section == "details":
+        details = snapshot.section("report").get("details")
+        return details if isinstance(details, SnapshotRecord) else EMPTY_RECORD
+    return snapshot.section(section)
+
+
+def snapshot_changes(
+    old: Optional[AtagSnapshot], new: Optional[AtagSnapshot]
+) -> Optional[FrozenSet[str]]:
+    """Return the changed sections and keys between two snapshots.
+
+    Every changed section is reported as "section" and every changed key in it
+    as "section.key". None means everything has to be considered changed.
+    """
+    if old is None or new is None:
+        return None
+
+    changes: Set[str] = set()
+    for section in SNAPSHOT_SECTIONS:
+        before = _section_record(old, section)
+        after = _section_record(new, section)
+        if before == after:
+            continue
+
+        changes.add(section)
+        for key in {*before, *after}:
+            if before.get(key, _MISSING) != after.get(key, _MISSING):
+                changes.add(f"{section}.{key}")
+    return frozenset(changes)
+
+
+def section_fingerprint(section: str, payload: Any) -> int:
+    """Return a cheap fingerprint of a reply section, ignoring its volatile fields."""
+    volatile = VOLATILE_FIELDS.get(section)
+    if volatile and isinstance(payload, dict):
+        payload = {key: value for key, value in payload.items() if key not in volatile}
+    return hash(repr(payload))
@@ -0,0 +1,131 @@
+"""
+Precompiled wire payloads for the ATAG One API wrapper
+
+The retrieve and pair messages never change and the update messages only
+differ in a handful of scalars, so instead of building dataclass trees and
+serialising them through dataclass_json on every call the payloads are
+rendered from templates that are compiled once at import time. The output is
+byte-for-byte identical to the AtagJson path.
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import json
+from dataclasses import asdict, fields
+from typing import Any, Dict, Optional
+
+from .atagonejson import (
+    AccountAuth,
+    Configuration,
+    Control,
+    Entry,
+    Schedules,
+    MESSAGE_INFO_ALL,
+)
+
+_ACCOUNT_AUTH = json.dumps(asdict(AccountAuth()))
+
+_RETRIEVE_PREFIX = '{"retrieve_message": {"seqnr": 0, "account_auth": %s, "info": ' % _ACCOUNT_AUTH
+_UPDATE_PREFIX = '{"update_message": {"seqnr": 0, "account_auth": %s' % _ACCOUNT_AUTH
+
+PAIR_PAYLOAD = json.dumps(
+    {"pair_message": {"seqnr": 0, "accounts": {"entries": [asdict(Entry())]}}}
+).encode()
+
+""" Sections of an update message in wire order, with their fields in wire order """
+_SECTION_FIELDS = {
+    "configuration": [f.name for f in fields(Configuration)],
+    "schedules": [f.name for f in fields(Schedules)],
+    "control": [f.name for f in fields(Control)],
+}
+
+""" Per field: (section, position, rendered key) """
+_FIELD_TEMPLATES = {
+    (section, name): (index, '"%s": ' % name)
+    for section, names in _SECTION_FIELDS.items()
+    for index, name in enumerate(names)
+}
+
+_SECTION_OPEN = {section: ', "%s": {' % section for section in _SECTION_FIELDS}
+
+""" Writable single fields and their section, the ones AtagJson has a *_json builder for """
+FIELD_SECTION = {
+    "ch_control_mode": "control",
+    "ch_mode": "control",
+    "ch_mode_temp": "control",
+    "dhw_temp_setp": "control",
+    "dhw_mode": "control",
+    "outs_temp_offs": "configuration",
+    "room_temp_offs": "configuration",
+    "summer_eco_mode": "configuration",
+    "summer_eco_temp": "configuration",
+    "ch_vacation_temp": "configuration",
+    "ch_building_size": "configuration",
+    "ch_isolation": "configuration",
+    "ch_heating_type": "configuration",
+    "wdr_temps_influence": "configuration",
+    "frost_prot_enabled": "configuration",
+}
+
+_retrieve_cache: Dict[int, bytes] = {}
+
+
+def retrieve_payload(info: int = MESSAGE_INFO_ALL) -> bytes:
+    """Return the cached retrieve message for an info bitmask."""
+    payload = _retrieve_cache.get(info)
+    if payload is None:
+        payload = _retrieve_cache[info] = f"{_RETRIEVE_PREFIX}{info}}}}}".encode()
+    return payload
+
+
+def update_payload(sections: Dict[str, Dict[str, Any]]) -> bytes:
+    """Render an update message with the given section fields."""
+    parts = [_UPDATE_PREFIX]
+    for section in _SECTION_FIELDS:
+        values = sections.get(section)
+        if values is None:
+            continue
+
+        rendered = []
+        for name, value in values.items():
+            if value is None:
+                continue
+            index, key = _FIELD_TEMPLATES[(section, name)]
+            rendered.append((index, key + json.dumps(value)))
+        rendered.sort()
+
+        parts.append(_SECTION_OPEN[section])
+        parts.append(", ".join(item for _, item in rendered))
+        parts.append("}")
+    parts.append("}}")
+    return "".join(parts).encode()
+
+
+def field_sections(name: str, value: Any) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Return the update sections for a single field write, None if unknown."""
+    section = FIELD_SECTION.get(name)
+    if section is None:
+        return None
+    return {section: {name: value}}
+
+
+def vacation_sections(start_dt_epoch: int, heat_temp: float, duration: int) -> Dict[str, Dict[str, Any]]:
+    """Return the update sections that create a vacation."""
+    return {
+        "configuration": {"start_vacation": start_dt_epoch, "ch_vacation_temp": heat_temp},
+        "control": {"vacation_duration": duration},
+    }
+
+
+def cancel_vacation_sections() -> Dict[str, Dict[str, Any]]:
+    """Return the update sections that cancel a vacation."""
+    return {
+        "configuration": {"start_vacation": 0},
+        "control": {"vacation_duration": 0, "ch_mode": 2},
+    }
+
+
+def schedule_sections(name: str, schedule: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Return the update sections that replace the ch_schedule or dhw_schedule."""
+    return {"schedules": {name: schedule}}
@@ -0,0 +1,79 @@
+"""
+Write coalescing for the ATAG One API wrapper
+
+Author: herikw
+https://github.com/herikw/home-assistant-custom-components
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+_LOGGER = logging.getLogger("atagoneapi")
+
+DEFAULT_WRITE_WINDOW = 0.1
+
+""" Update message sections that can be merged, in wire order """
+UPDATE_SECTIONS = ("configuration", "schedules", "control")
+
+
+class WriteCoalescer:
+    """Gather update messages issued within a short window into one request.
+
+    Every update written while a window is open is merged section by
+    section (later writes win for the same field) and sent as a single
+    UpdateMessage when the window closes. All callers of that window get the
+    shared result, or the shared exception.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Dict[str, Dict[str, Any]]], Awaitable[bool]],
+        window: float = DEFAULT_WRITE_WINDOW,
+    ):
+        self._send = send
+        self.window = window
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._future: Optional[asyncio.Future] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def async_write(self, sections: Optional[Dict[str, Dict[str, Any]]]) -> bool:
+        """Queue update sections and wait for the merged request to finish."""
+        if not sections:
+            return False
+
+        for section in UPDATE_SECTIONS:
+            if section in sections:
+                self._pending.setdefault(section, {}).update(sections[section])
+
+        if self._future is None:
+            loop = asyncio.get_running_loop()
+            self._future = loop.create_future()
+            self._future.add_done_callback(_consume_exception)
+            loop.call_later(self.window, self._start_flush)
+
+        return await asyncio.shield(self._future)
+
+    def _start_flush(self) -> None:
+        self._flush_task = asyncio.get_running_loop().create_task(self._async_flush())
+
+    async def _async_flush(self) -> None:
+        sections, self._pending = self._pending, {}
+        future, self._future = self._future, None
+
+        _LOGGER.debug("Sending %s coalesced update section(s)", len(sections))
+        try:
+            result = await self._send(sections)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    """Mark the shared exception as retrieved when every caller went away."""
+    if not future.cancelled():
+        future.exception()